@@ -0,0 +1,162 @@
+"""CPU cost of relaying one minute of Gemini live audio, legacy vs optimized relay.
+
+Run from the repository root:
+
+    python -m benchmarks.gemini_relay [--minutes N]
+
+No network access or API key is used: server messages are built locally with the
+SDK's own pydantic types and the browser/upstream sockets are in-memory fakes.
+"""
+import argparse
+import asyncio
+import base64
+import contextlib
+import io
+import json
+import os
+import time
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+
+from google.genai import types  # noqa: E402
+
+from gemini.live import build_media_chunks, relay_server_message  # noqa: E402
+
+OUTPUT_RATE = 24000 * 2  # Gemini replies with 24 kHz PCM16
+INPUT_RATE = 16000 * 2  # browsers send 16 kHz PCM16
+OUTPUT_CHUNK_MS = 40
+INPUT_CHUNK_MS = 20
+INPUT_CHUNKS_PER_MESSAGE = 5
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.frames = 0
+        self.bytes = 0
+
+    async def send_text(self, text):
+        self.frames += 1
+        self.bytes += len(text)
+
+    async def send_bytes(self, data):
+        self.frames += 1
+        self.bytes += len(data)
+
+
+class FakeSession:
+    """Stands in for the SDK session: one JSON frame per `send` / `send_realtime_input` call."""
+
+    def __init__(self):
+        self.frames = 0
+
+    async def send(self, input):
+        if not isinstance(input, list):
+            input = [input]
+        json.dumps({"realtime_input": {"media_chunks": input}})
+        self.frames += 1
+
+    async def send_realtime_input(self, **kwargs):
+        (kind, blob), = kwargs.items()
+        data = base64.b64encode(blob["data"]).decode("ascii")
+        json.dumps({"realtime_input": {kind: {"mime_type": blob["mime_type"], "data": data}}})
+        self.frames += 1
+
+
+def server_messages(minutes: float):
+    chunk = os.urandom(OUTPUT_RATE * OUTPUT_CHUNK_MS // 1000)
+    count = int(minutes * 60 * 1000 / OUTPUT_CHUNK_MS)
+    message = types.LiveServerMessage(
+        server_content=types.LiveServerContent(
+            model_turn=types.Content(parts=[types.Part(inline_data=types.Blob(data=chunk, mime_type="audio/pcm"))])
+        )
+    )
+    return [message] * count
+
+
+def client_messages(minutes: float):
+    chunk = base64.b64encode(os.urandom(INPUT_RATE * INPUT_CHUNK_MS // 1000)).decode("ascii")
+    count = int(minutes * 60 * 1000 / INPUT_CHUNK_MS / INPUT_CHUNKS_PER_MESSAGE)
+    message = json.dumps({
+        "realtime_input": {"media_chunks": [{"mime_type": "audio/pcm", "data": chunk}] * INPUT_CHUNKS_PER_MESSAGE}
+    })
+    return [message] * count
+
+
+async def legacy_receive(websocket, response):
+    # Body of the original receive_from_gemini loop.
+    print(f"response: {response}")
+    if response.server_content is None:
+        print(f"Unhandled server message! - {response}")
+        return
+    model_turn = response.server_content.model_turn
+    if model_turn:
+        for part in model_turn.parts:
+            if hasattr(part, 'text') and part.text is not None:
+                await websocket.send_text(json.dumps({"text": part.text}))
+            elif hasattr(part, 'inline_data') and part.inline_data is not None:
+                print("audio mime_type:", part.inline_data.mime_type)
+                base64_audio = base64.b64encode(part.inline_data.data).decode('utf-8')
+                await websocket.send_text(json.dumps({"audio": base64_audio}))
+                print("audio received")
+
+
+async def legacy_send(session, message):
+    # Body of the original send_to_gemini loop: one upstream send per chunk.
+    data = json.loads(message)
+    if "realtime_input" in data:
+        for chunk in data["realtime_input"]["media_chunks"]:
+            if chunk["mime_type"] == "audio/pcm":
+                await session.send({"mime_type": "audio/pcm", "data": chunk["data"]})
+            elif chunk["mime_type"] == "image/jpeg":
+                await session.send({"mime_type": "image/jpeg", "data": chunk["data"]})
+
+
+async def optimized_send(session, message):
+    data = json.loads(message)
+    if "realtime_input" in data:
+        for kind, blob in build_media_chunks(data):
+            await session.send_realtime_input(**{kind: blob})
+
+
+async def run(mode: str, minutes: float) -> dict:
+    browser, session = FakeBrowser(), FakeSession()
+    downstream, upstream = server_messages(minutes), client_messages(minutes)
+
+    start = time.process_time()
+    with contextlib.redirect_stdout(io.StringIO()) if mode == "legacy" else contextlib.nullcontext():
+        for response in downstream:
+            if mode == "legacy":
+                await legacy_receive(browser, response)
+            else:
+                await relay_server_message(browser, response, binary=(mode == "binary"))
+        for message in upstream:
+            if mode == "legacy":
+                await legacy_send(session, message)
+            else:
+                await optimized_send(session, message)
+    cpu = time.process_time() - start
+
+    return {
+        "mode": mode,
+        "cpu_seconds_per_audio_minute": round(cpu / minutes, 4),
+        "browser_frames": browser.frames,
+        "browser_bytes": browser.bytes,
+        "upstream_frames": session.frames,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--minutes", type=float, default=1.0)
+    args = parser.parse_args()
+
+    results = [asyncio.run(run(mode, args.minutes)) for mode in ("legacy", "json", "binary")]
+    baseline = results[0]["cpu_seconds_per_audio_minute"]
+    for result in results:
+        cpu = result["cpu_seconds_per_audio_minute"]
+        result["cpu_saved_vs_legacy"] = f"{(1 - cpu / baseline) * 100:.1f}%" if baseline else "n/a"
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Cold import time of `main` for each ENABLED_ROUTERS configuration.
+
+Run from the repository root:
+
+    python -m benchmarks.import_time [--runs N] [--top N]
+
+Every run is a fresh interpreter (`python -X importtime -c "import main"`), so
+the numbers match what an autoscaled worker pays before it can serve traffic.
+No network access, database or API key is needed: nothing connects at import.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+CONFIGURATIONS = ("gemini,chatgpt,elevenlabs", "chatgpt", "gemini", "elevenlabs")
+
+
+def run_once(routers: str):
+    env = dict(os.environ, ENABLED_ROUTERS=routers, LOG_LEVEL="WARNING")
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"import main failed for ENABLED_ROUTERS={routers}:\n{result.stderr[-2000:]}")
+    return wall, result.stderr
+
+
+def top_imports(stderr: str, count: int):
+    # Lines look like: "import time:       self [us] |  cumulative | imported package"
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # Nesting is two spaces per level after one separator space; level 1 is
+        # what `main` imported directly, including everything pulled in beneath it.
+        if (len(name) - len(name.lstrip()) - 1) // 2 == 1:
+            modules.append((int(cumulative), name.strip()))
+    modules.sort(reverse=True)
+    return [{"module": name, "cumulative_ms": round(us / 1000, 1)} for us, name in modules[:count]]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5)
+    args = parser.parse_args()
+
+    for routers in CONFIGURATIONS:
+        walls, stderr = [], ""
+        for _ in range(args.runs):
+            wall, stderr = run_once(routers)
+            walls.append(wall)
+        print(json.dumps({
+            "enabled_routers": routers,
+            "wall_ms_median": round(statistics.median(walls) * 1000, 1),
+            "wall_ms_min": round(min(walls) * 1000, 1),
+            "top_imports": top_imports(stderr, args.top),
+        }))
+
+
+if __name__ == "__main__":
+    main()
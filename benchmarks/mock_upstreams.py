@@ -0,0 +1,126 @@
+"""Local stand-ins for the OpenAI realtime, Gemini Live and ElevenLabs websockets.
+
+Run from the repository root:
+
+    python -m benchmarks.mock_upstreams [--port BASE]
+
+Serves OpenAI on BASE, Gemini on BASE+1 and ElevenLabs on BASE+2. Each mock
+answers client audio with a burst of audio chunks whose first bytes are the
+send time (`STAMP`, seconds since the epoch), so a client at the far end of the
+relay can measure upstream -> browser latency without clock bookkeeping.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import struct
+import time
+
+from websockets.asyncio.server import serve
+from websockets.exceptions import ConnectionClosed
+
+STAMP = struct.Struct("<d")
+
+# 40 ms of 24 kHz PCM16 per reply chunk, REPLY_CHUNKS chunks per reply.
+REPLY_CHUNK_BYTES = 24000 * 2 * 40 // 1000
+REPLY_CHUNKS = 5
+REPLY_INTERVAL = 0.04
+# Gemini and ElevenLabs reply once every INPUTS_PER_REPLY client audio messages.
+INPUTS_PER_REPLY = 10
+
+
+def stamped_audio() -> str:
+    pcm = STAMP.pack(time.time()) + bytes(REPLY_CHUNK_BYTES - STAMP.size)
+    return base64.b64encode(pcm).decode("ascii")
+
+
+async def reply(websocket, encode):
+    for _ in range(REPLY_CHUNKS):
+        await websocket.send(encode(stamped_audio()))
+        await asyncio.sleep(REPLY_INTERVAL)
+
+
+async def openai_upstream(websocket):
+    """Replies to every `response.create` with audio deltas and a `response.done`."""
+    async for message in websocket:
+        if json.loads(message).get("type") != "response.create":
+            continue
+        await reply(
+            websocket,
+            lambda audio: '{"type":"response.audio.delta","delta":"' + audio + '"}',
+        )
+        await websocket.send(json.dumps({
+            "type": "response.done",
+            "response": {
+                "output": [{"content": [{"transcript": "ok"}]}],
+                "usage": {"input_tokens": 10, "output_tokens": 20, "total_tokens": 30},
+            },
+        }))
+
+
+async def gemini_upstream(websocket):
+    """Completes the `setup` handshake, then replies with inline audio model turns."""
+    await websocket.recv()
+    await websocket.send(json.dumps({"setupComplete": {}}))
+    inputs = 0
+    async for _ in websocket:
+        inputs += 1
+        if inputs % INPUTS_PER_REPLY:
+            continue
+        await reply(websocket, lambda audio: json.dumps({
+            "serverContent": {
+                "modelTurn": {"parts": [{"inlineData": {"mimeType": "audio/pcm;rate=24000", "data": audio}}]},
+            },
+        }))
+        await websocket.send(json.dumps({"serverContent": {"turnComplete": True}}))
+
+
+async def elevenlabs_upstream(websocket):
+    """Replies to user audio chunks with `audio` events, as the conversation API does."""
+    inputs = 0
+    event_id = 0
+    async for message in websocket:
+        if "user_audio_chunk" not in message:
+            continue
+        inputs += 1
+        if inputs % INPUTS_PER_REPLY:
+            continue
+        event_id += 1
+        await reply(websocket, lambda audio: json.dumps({
+            "type": "audio",
+            "audio_event": {"audio_base_64": audio, "event_id": event_id},
+        }))
+
+
+UPSTREAMS = (openai_upstream, gemini_upstream, elevenlabs_upstream)
+
+
+def quiet(handler):
+    # The relay hanging up mid-reply is the normal end of a benchmark session.
+    async def handle(websocket):
+        try:
+            await handler(websocket)
+        except ConnectionClosed:
+            pass
+    return handle
+
+
+async def run(host: str, base_port: int):
+    servers = [
+        await serve(quiet(handler), host, base_port + offset, compression=None, max_size=None)
+        for offset, handler in enumerate(UPSTREAMS)
+    ]
+    print(json.dumps({handler.__name__: base_port + offset for offset, handler in enumerate(UPSTREAMS)}), flush=True)
+    await asyncio.gather(*(server.serve_forever() for server in servers))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    args = parser.parse_args()
+    asyncio.run(run(args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
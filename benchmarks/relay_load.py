@@ -0,0 +1,220 @@
+"""Concurrent realtime sessions through the relay against local mock upstreams.
+
+Run from the repository root:
+
+    python -m benchmarks.relay_load [--sessions N] [--seconds S] [--providers openai,gemini,elevenlabs]
+
+Starts `benchmarks.mock_upstreams` and the app (`benchmarks.serve`) as
+subprocesses, then drives N browser-like sessions per provider, each sending
+20 ms of PCM16 every 20 ms and ending an utterance every INPUTS_PER_REPLY
+chunks. Reported per provider:
+
+- throughput: audio frames and bytes relayed to the clients per second
+- latency: p50/p99 from the mock writing an audio chunk to the client reading it
+- server CPU (ms per session-second) and RSS growth per session, from /proc
+
+No network access or API key is needed; everything runs on localhost.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+from websockets.asyncio.client import connect
+
+from benchmarks.mock_upstreams import INPUTS_PER_REPLY, STAMP
+from core.audio_frames import AUDIO_FRAME, BINARY_SUBPROTOCOL, COMMIT_FRAME
+
+INPUT_CHUNK_MS = 20
+INPUT_CHUNK = bytes(16000 * 2 * INPUT_CHUNK_MS // 1000)
+INPUT_CHUNK_BASE64 = base64.b64encode(INPUT_CHUNK).decode("ascii")
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+# provider -> ENABLED_ROUTERS name
+ROUTER_FOR = {"openai": "chatgpt", "gemini": "gemini", "elevenlabs": "elevenlabs"}
+
+
+class SessionResult:
+    def __init__(self):
+        self.frames = 0
+        self.bytes = 0
+        self.latencies = []
+        self.error = None
+
+
+def record_audio(result: SessionResult, pcm: bytes):
+    result.frames += 1
+    result.bytes += len(pcm)
+    if len(pcm) >= STAMP.size:
+        result.latencies.append(time.time() - STAMP.unpack_from(pcm)[0])
+
+
+async def pace(seconds: float, send):
+    deadline = time.perf_counter() + seconds
+    next_at = time.perf_counter()
+    sent = 0
+    while next_at < deadline:
+        sent += 1
+        await send(sent)
+        next_at += INPUT_CHUNK_MS / 1000
+        await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+
+
+async def receive_binary(ws, result: SessionResult):
+    async for message in ws:
+        if isinstance(message, bytes) and message[:1] == bytes((AUDIO_FRAME,)):
+            record_audio(result, message[1:])
+
+
+async def receive_elevenlabs(ws, result: SessionResult):
+    async for message in ws:
+        if '"audio_event"' in message:
+            record_audio(result, base64.b64decode(json.loads(message)["audio_event"]["audio_base_64"]))
+
+
+async def run_session(provider: str, base_url: str, index: int, seconds: float) -> SessionResult:
+    result = SessionResult()
+    frame = bytes((AUDIO_FRAME,)) + INPUT_CHUNK
+    if provider == "openai":
+        url = f"{base_url}/chatgpt/ws/load-{index}-{time.monotonic_ns()}/alloy?commit_policy=manual"
+        subprotocols, receive = [BINARY_SUBPROTOCOL], receive_binary
+    elif provider == "gemini":
+        url = f"{base_url}/gemini/ws"
+        subprotocols, receive = [BINARY_SUBPROTOCOL], receive_binary
+    else:
+        url = f"{base_url}/elevenlabs/ws/load-agent"
+        subprotocols, receive = None, receive_elevenlabs
+        frame = '{"user_audio_chunk":"' + INPUT_CHUNK_BASE64 + '"}'
+
+    try:
+        async with connect(url, subprotocols=subprotocols, compression=None, max_size=None) as ws:
+            if provider == "gemini":
+                await ws.send(json.dumps({"setup": {"response_modalities": ["AUDIO"]}}))
+            receiver = asyncio.create_task(receive(ws, result))
+
+            async def send(sent: int):
+                await ws.send(frame)
+                if provider == "openai" and sent % INPUTS_PER_REPLY == 0:
+                    await ws.send(bytes((COMMIT_FRAME,)))
+
+            await pace(seconds, send)
+            # Let the last replies drain before hanging up.
+            await asyncio.sleep(0.5)
+            receiver.cancel()
+    except Exception as e:
+        result.error = repr(e)
+    return result
+
+
+def process_cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    # utime and stime are fields 14 and 15; the split above starts at field 3.
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS
+
+
+def process_rss_bytes(pid: int) -> int:
+    with open(f"/proc/{pid}/statm") as f:
+        return int(f.read().split()[1]) * PAGE_SIZE
+
+
+async def sample_peak_rss(pid: int, peak: list):
+    while True:
+        peak[0] = max(peak[0], process_rss_bytes(pid))
+        await asyncio.sleep(0.1)
+
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def load(provider: str, base_url: str, pid: int, sessions: int, seconds: float) -> dict:
+    cpu_before = process_cpu_seconds(pid)
+    rss_before = process_rss_bytes(pid)
+    peak = [rss_before]
+    sampler = asyncio.create_task(sample_peak_rss(pid, peak))
+    start = time.perf_counter()
+    results = await asyncio.gather(*(run_session(provider, base_url, i, seconds) for i in range(sessions)))
+    elapsed = time.perf_counter() - start
+    sampler.cancel()
+    cpu = process_cpu_seconds(pid) - cpu_before
+
+    latencies = [latency for result in results for latency in result.latencies]
+    errors = [result.error for result in results if result.error]
+    frames = sum(result.frames for result in results)
+    return {
+        "provider": provider,
+        "sessions": sessions,
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        "frames_per_s": round(frames / elapsed, 1),
+        "bytes_per_s": round(sum(result.bytes for result in results) / elapsed),
+        "latency_ms_p50": round(statistics.median(latencies) * 1000, 2) if latencies else None,
+        "latency_ms_p99": round(percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+        "server_cpu_ms_per_session_s": round(cpu * 1000 / (sessions * seconds), 3),
+        "server_rss_kb_per_session": round((peak[0] - rss_before) / 1024 / sessions, 1),
+    }
+
+
+def wait_for_http(url: str, process: subprocess.Popen, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"app exited with code {process.returncode}")
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"app did not come up at {url}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--providers", default="openai,gemini,elevenlabs")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--mock-port", type=int, default=9100)
+    args = parser.parse_args()
+    providers = args.providers.split(",")
+
+    mocks = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.mock_upstreams", "--port", str(args.mock_port)],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    mocks.stdout.readline()  # ports banner: the servers are listening
+    env = dict(
+        os.environ,
+        ENABLED_ROUTERS=",".join(ROUTER_FOR[provider] for provider in providers),
+        OPENAI_REALTIME_URL=f"ws://127.0.0.1:{args.mock_port}/",
+        OPENAI_API_KEY="benchmark",
+        BENCHMARK_GEMINI_LIVE_URL=f"ws://127.0.0.1:{args.mock_port + 1}",
+        GEMINI_API_KEY="benchmark",
+        ELEVENLABS_CONVERSATION_URL=f"ws://127.0.0.1:{args.mock_port + 2}/?agent_id={{agent_id}}",
+        ADMISSION_MAX_SESSIONS="0",
+        LOG_LEVEL="WARNING",
+    )
+    app = subprocess.Popen([sys.executable, "-m", "benchmarks.serve", "--port", str(args.port)], env=env)
+    try:
+        wait_for_http(f"http://127.0.0.1:{args.port}/admission-stats", app)
+        for provider in providers:
+            report = asyncio.run(load(provider, f"ws://127.0.0.1:{args.port}", app.pid, args.sessions, args.seconds))
+            print(json.dumps(report), flush=True)
+    finally:
+        for process in (app, mocks):
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
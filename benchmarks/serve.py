@@ -0,0 +1,42 @@
+"""Run the app under uvicorn with the Gemini Live client pointed at a local URL.
+
+Used by `benchmarks.relay_load`:
+
+    BENCHMARK_GEMINI_LIVE_URL=ws://127.0.0.1:9101 python -m benchmarks.serve [--port N]
+
+OpenAI and ElevenLabs take their upstream URLs from OPENAI_REALTIME_URL and
+ELEVENLABS_CONVERSATION_URL; the Gemini SDK always builds a wss:// URL from its
+base URL, so the live client is patched here instead of in the app.
+"""
+import argparse
+import os
+
+import uvicorn
+
+GEMINI_LIVE_URL = os.getenv("BENCHMARK_GEMINI_LIVE_URL")
+
+
+def point_gemini_at(url: str):
+    from gemini.live import get_live_client
+
+    api_client = get_live_client()._api_client
+    api_client._websocket_base_url = lambda: url
+    if url.startswith("ws://"):
+        api_client._websocket_ssl_ctx = {}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    import main as app_module
+
+    if GEMINI_LIVE_URL and "gemini" in app_module.modules:
+        point_gemini_at(GEMINI_LIVE_URL)
+    uvicorn.run(app_module.app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+import asyncio
+import os
+from collections import deque
+from typing import Deque, Dict, Tuple
+
+from fastapi import WebSocket
+
+from core import config  # noqa: F401  (loads .env)
+
+PROVIDERS = ("openai", "gemini", "elevenlabs")
+
+# 0 means "no limit".
+ADMISSION_MAX_SESSIONS = int(os.getenv("ADMISSION_MAX_SESSIONS", "500"))
+ADMISSION_PROVIDER_LIMITS = {
+    provider: int(os.getenv(f"ADMISSION_MAX_SESSIONS_{provider.upper()}", "0"))
+    for provider in PROVIDERS
+}
+# How long a connection may wait for a free slot; 0 rejects immediately.
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "0"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "100"))
+
+# RFC 6455 "Try Again Later": the server is overloaded.
+TRY_AGAIN_LATER = 1013
+
+
+class AdmissionController:
+    """Caps concurrent realtime sessions globally and per provider.
+
+    Every accepted session holds upstream sockets and buffers, so admission is
+    checked before any of that is set up. Connections over the limit may wait in
+    a bounded queue for up to `queue_timeout` seconds, otherwise they are rejected.
+
+    A released slot is handed straight to the oldest waiter that fits, so newly
+    arriving connections cannot overtake the queue.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = ADMISSION_MAX_SESSIONS,
+        provider_limits: Dict[str, int] = ADMISSION_PROVIDER_LIMITS,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+    ):
+        self.max_sessions = max_sessions
+        self.provider_limits = provider_limits
+        self.queue_timeout = queue_timeout
+        self.max_queue = max_queue
+        self.waiters: Deque[Tuple[str, asyncio.Future]] = deque()
+        self.live: Dict[str, int] = {}
+        self.queued: Dict[str, int] = {}
+        self.admitted: Dict[str, int] = {}
+        self.rejected: Dict[str, int] = {}
+
+    def _has_room(self, provider: str) -> bool:
+        if self.max_sessions and sum(self.live.values()) >= self.max_sessions:
+            return False
+        limit = self.provider_limits.get(provider, 0)
+        return not limit or self.live.get(provider, 0) < limit
+
+    def _admit(self, provider: str):
+        self.live[provider] = self.live.get(provider, 0) + 1
+        self.admitted[provider] = self.admitted.get(provider, 0) + 1
+
+    def _reject(self, provider: str) -> bool:
+        self.rejected[provider] = self.rejected.get(provider, 0) + 1
+        return False
+
+    async def admit(self, provider: str) -> bool:
+        # Every waiter left in the queue lacks room (see `_hand_off`), so a free
+        # slot here is one no earlier arrival can use.
+        if self._has_room(provider):
+            self._admit(provider)
+            return True
+        if self.queue_timeout <= 0 or len(self.waiters) >= self.max_queue:
+            return self._reject(provider)
+
+        waiter = (provider, asyncio.get_running_loop().create_future())
+        self.waiters.append(waiter)
+        self.queued[provider] = self.queued.get(provider, 0) + 1
+        try:
+            return await asyncio.wait_for(waiter[1], self.queue_timeout)
+        except asyncio.TimeoutError:
+            return self._reject(provider)
+        except asyncio.CancelledError:
+            if waiter[1].done() and not waiter[1].cancelled():
+                self._free(provider)  # handed a slot just as the connection went away
+            raise
+        finally:
+            self.queued[provider] -= 1
+            if waiter in self.waiters:
+                self.waiters.remove(waiter)
+
+    def _free(self, provider: str):
+        self.live[provider] = max(self.live.get(provider, 0) - 1, 0)
+        self._hand_off()
+
+    def _hand_off(self):
+        # Oldest first; a waiter held back by its provider limit does not block
+        # waiters for other providers behind it.
+        for waiter in list(self.waiters):
+            provider, future = waiter
+            if future.done():
+                continue
+            if self._has_room(provider):
+                self.waiters.remove(waiter)
+                self._admit(provider)
+                future.set_result(True)
+
+    async def release(self, provider: str):
+        self._free(provider)
+
+    def stats(self) -> dict:
+        return {
+            "max_sessions": self.max_sessions,
+            "provider_limits": self.provider_limits,
+            "live": dict(self.live),
+            "queued": dict(self.queued),
+            "admitted": dict(self.admitted),
+            "rejected": dict(self.rejected),
+        }
+
+
+async def reject_websocket(websocket: WebSocket):
+    # Accept first so the client actually sees the close code instead of an HTTP 403.
+    await websocket.accept()
+    await websocket.close(code=TRY_AGAIN_LATER, reason="Server busy, try again later")
+
+
+admission = AdmissionController()
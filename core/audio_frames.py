@@ -0,0 +1,6 @@
+# Clients that offer this websocket subprotocol exchange audio as binary frames:
+# one header byte followed by raw little-endian PCM16 samples. A bare COMMIT_FRAME
+# byte marks the end of the user's utterance.
+BINARY_SUBPROTOCOL = "audio.pcm16"
+AUDIO_FRAME = 0x01
+COMMIT_FRAME = 0x02
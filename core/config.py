@@ -0,0 +1,20 @@
+"""Process-wide settings shared by main.py and the provider packages.
+
+Importing this module loads `.env` once; modules that read settings with
+`os.getenv` at import time import it first instead of calling `load_dotenv()`
+themselves.
+"""
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+ROUTER_NAMES = ("gemini", "chatgpt", "elevenlabs")
+# Comma-separated subset of ROUTER_NAMES this worker serves, e.g. "chatgpt".
+ENABLED_ROUTERS = tuple(
+    name.strip() for name in os.getenv("ENABLED_ROUTERS", ",".join(ROUTER_NAMES)).split(",") if name.strip()
+)
+# Development convenience: create tables and apply migrations in the app lifespan.
+# Deployments should run `python -m open_ai.migrations` as a separate step instead.
+RUN_MIGRATIONS_ON_STARTUP = os.getenv("RUN_MIGRATIONS_ON_STARTUP", "false").lower() == "true"
@@ -0,0 +1,144 @@
+import atexit
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+from core import config  # noqa: F401  (loads .env)
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# Per-module overrides, e.g. "open_ai.endpoints=DEBUG,core.session_pool=WARNING".
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+# "json" (one object per line) or "text".
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_SAMPLE_RATE = int(os.getenv("LOG_SAMPLE_RATE", "200"))
+
+# Attributes every LogRecord has; anything else came in through `extra=`.
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+def _extras(record: logging.LogRecord) -> dict:
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRS}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(_extras(record))
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s - %(levelname)s - %(name)s - %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = super().format(record)
+        extras = _extras(record)
+        if extras:
+            line += " " + " ".join(f"{key}={value}" for key, value in extras.items())
+        return line
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Never blocks the event loop: records are dropped when the queue is full."""
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Formatting stays on the listener thread; only resolve what can't cross threads.
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+
+def parse_levels(spec: str) -> Dict[str, str]:
+    levels = {}
+    for item in spec.split(","):
+        if "=" in item:
+            name, level = item.split("=", 1)
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def setup_logging(
+    level: str = LOG_LEVEL,
+    levels: str = LOG_LEVELS,
+    fmt: str = LOG_FORMAT,
+    queue_size: int = LOG_QUEUE_SIZE,
+):
+    """Route all logging through a bounded queue drained by a background thread.
+
+    Callers only pay for building the record; formatting and the blocking stderr
+    write happen on the listener thread. Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    stream = logging.StreamHandler(sys.stderr)
+    stream.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_DroppingQueueHandler(queue.Queue(queue_size)))
+    root.setLevel(level)
+    for name, module_level in parse_levels(levels).items():
+        logging.getLogger(name).setLevel(module_level)
+
+    _listener = logging.handlers.QueueListener(root.handlers[0].queue, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return _listener
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class SampledLogger:
+    """Logs only every `rate`-th call, for events that fire per frame.
+
+    Messages use lazy %-style arguments, so skipped calls never format anything.
+    Each emitted record carries `sampled_every` so readers can scale counts back up.
+    """
+
+    def __init__(self, logger: logging.Logger, rate: int = 100, level: int = logging.DEBUG):
+        self.logger = logger
+        self.rate = max(rate, 1)
+        self.level = level
+        self.counter = itertools.count()
+
+    def log(self, msg: str, *args):
+        if next(self.counter) % self.rate:
+            return
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, msg, *args, extra={"sampled_every": self.rate})
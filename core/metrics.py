@@ -0,0 +1,275 @@
+import bisect
+import math
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values: str):
+        """Child for one label combination; hot paths should keep the returned object."""
+        key = tuple(str(value) for value in values)
+        child = self.children.get(key)
+        if child is None:
+            child = self.children[key] = self._new_child()
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in list(self.children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def _render_child(self, values, child) -> List[str]:
+        return [f"{self.name}{_labels(self.labelnames, values)} {_format_value(child.value)}"]
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.function: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None
+
+    def _new_child(self):
+        return _Value()
+
+    def set_function(self, function: Callable[[], Dict[Tuple[str, ...], float]]):
+        """Compute the values at scrape time instead of tracking them on the hot path."""
+        self.function = function
+
+    def render(self) -> List[str]:
+        if self.function is not None:
+            for values, value in self.function().items():
+                self.labels(*values).set(value)
+        return super().render()
+
+
+class _HistogramValue:
+    __slots__ = ("upper_bounds", "counts", "sum", "count")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * (len(upper_bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.upper_bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self):
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ("histogram", "start")
+
+    def __init__(self, histogram: _HistogramValue):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.upper_bounds = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramValue(self.upper_bounds)
+
+    def _render_child(self, values, child) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.upper_bounds + (math.inf,), child.counts):
+            cumulative += count
+            le = 'le="' + _format_value(bound) + '"'
+            lines.append(f"{self.name}_bucket{_labels(self.labelnames, values, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{_labels(self.labelnames, values)} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{_labels(self.labelnames, values)} {child.count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: List[_Metric] = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+HTTP_REQUEST_SECONDS = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", ("method", "route", "status"),
+))
+UPSTREAM_CONNECT_SECONDS = registry.register(Histogram(
+    "realtime_upstream_connect_seconds", "Time to open and configure an upstream realtime session.", ("provider",),
+))
+FIRST_AUDIO_SECONDS = registry.register(Histogram(
+    "realtime_first_audio_seconds", "Time from session start to the first audio relayed to the client.", ("provider",),
+))
+TURN_LATENCY_SECONDS = registry.register(Histogram(
+    "realtime_turn_latency_seconds", "Last user audio received to first response audio sent, per turn.", ("provider",),
+))
+RELAY_FRAMES = registry.register(Counter(
+    "realtime_relayed_frames_total", "Frames relayed per provider and direction.", ("provider", "direction"),
+))
+RELAY_BYTES = registry.register(Counter(
+    "realtime_relayed_bytes_total", "Payload bytes relayed per provider and direction.", ("provider", "direction"),
+))
+TOKENS = registry.register(Counter(
+    "openai_realtime_tokens_total", "Token usage reported by response.done.", ("kind",),
+))
+DB_INSERT_SECONDS = registry.register(Histogram(
+    "db_insert_duration_seconds", "Latency of one batched conversation INSERT.", ("table",),
+))
+DB_INSERT_ROWS = registry.register(Counter(
+    "db_inserted_rows_total", "Rows written by the batched conversation writer.", ("table",),
+))
+ACTIVE_SESSIONS = registry.register(Gauge(
+    "realtime_active_sessions", "Realtime sessions currently admitted.", ("provider",),
+))
+UPSTREAM_RECONNECTS = registry.register(Counter(
+    "realtime_upstream_reconnects_total", "Upstream reconnects after a dropped session, by outcome.", ("provider", "outcome"),
+))
+UPSTREAM_CIRCUIT_OPEN = registry.register(Gauge(
+    "realtime_upstream_circuit_open", "1 while the circuit breaker for an upstream endpoint is open or half-open.", ("endpoint",),
+))
+
+TO_CLIENT = "upstream_to_client"
+TO_UPSTREAM = "client_to_upstream"
+
+
+class RelayMeter:
+    """Pre-bound frame/byte counters for one provider, so the per-frame cost is two adds."""
+
+    __slots__ = ("to_client_frames", "to_client_bytes", "to_upstream_frames", "to_upstream_bytes")
+
+    def __init__(self, provider: str):
+        self.to_client_frames = RELAY_FRAMES.labels(provider, TO_CLIENT)
+        self.to_client_bytes = RELAY_BYTES.labels(provider, TO_CLIENT)
+        self.to_upstream_frames = RELAY_FRAMES.labels(provider, TO_UPSTREAM)
+        self.to_upstream_bytes = RELAY_BYTES.labels(provider, TO_UPSTREAM)
+
+    def to_client(self, size: int):
+        self.to_client_frames.value += 1
+        self.to_client_bytes.value += size
+
+    def to_upstream(self, size: int):
+        self.to_upstream_frames.value += 1
+        self.to_upstream_bytes.value += size
+
+
+# Anything else (including made-up methods from clients) is recorded as "other".
+HTTP_METHODS = frozenset(("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"))
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request latency per route template.
+
+    `route_prefixes` maps `id(route)` to the prefix its router was included
+    under: FastAPI leaves included routes' `path` relative to their router.
+    """
+
+    def __init__(self, app, route_prefixes: Optional[Dict[int, str]] = None):
+        self.app = app
+        self.route_prefixes = route_prefixes if route_prefixes is not None else {}
+
+    def route_label(self, scope) -> str:
+        route = scope.get("route")
+        path = getattr(route, "path", None)
+        if path is None:
+            return "unmatched"
+        return scope.get("root_path", "") + self.route_prefixes.get(id(route), "") + path
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            method = scope["method"] if scope["method"] in HTTP_METHODS else "other"
+            HTTP_REQUEST_SECONDS.labels(method, self.route_label(scope), status[0]).observe(
+                time.perf_counter() - start
+            )
@@ -0,0 +1,340 @@
+import asyncio
+import logging
+import ssl
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from fastapi import WebSocket, WebSocketDisconnect
+from websockets.exceptions import ConnectionClosed
+
+try:
+    # websockets >= 13 ships the new asyncio implementation under its own module.
+    from websockets.asyncio.client import connect as _ws_connect
+    _HEADERS_ARG = "additional_headers"
+except ImportError:
+    from websockets import connect as _ws_connect
+    _HEADERS_ARG = "extra_headers"
+
+from core.admission import admission, reject_websocket, TRY_AGAIN_LATER
+from core.metrics import RelayMeter, FIRST_AUDIO_SECONDS, UPSTREAM_CONNECT_SECONDS, UPSTREAM_RECONNECTS
+from core.resilience import CircuitOpen, RECONNECT_BUFFER_BYTES, backoff_delays, breakers, upstream_dropped
+
+logger = logging.getLogger(__name__)
+
+# Close codes sent to the browser when the relay ends on the server side.
+NORMAL_CLOSURE = 1000
+INTERNAL_ERROR = 1011
+
+
+def connect_websocket(url: str, headers: Optional[dict] = None, ssl_context: Optional[ssl.SSLContext] = None, **kwargs):
+    """`websockets.connect` across library versions; awaitable or usable with `async with`."""
+    if headers:
+        kwargs[_HEADERS_ARG] = headers
+    if ssl_context is not None and url.startswith("wss://"):
+        kwargs["ssl"] = ssl_context
+    return _ws_connect(url, **kwargs)
+
+
+_meters: Dict[str, RelayMeter] = {}
+
+
+class RelayStats:
+    """Per-session frame/byte counters, mirrored into the process-wide relay metrics."""
+
+    def __init__(self, provider: str):
+        meter = _meters.get(provider)
+        if meter is None:
+            meter = _meters[provider] = RelayMeter(provider)
+        self.meter = meter
+        self.first_audio_seconds = FIRST_AUDIO_SECONDS.labels(provider)
+        self.started_at = time.perf_counter()
+        self.first_audio_at: Optional[float] = None
+        self.frames_to_upstream = 0
+        self.bytes_to_upstream = 0
+        self.frames_to_client = 0
+        self.bytes_to_client = 0
+
+    @property
+    def awaiting_audio(self) -> bool:
+        return self.first_audio_at is None
+
+    def to_upstream(self, size: int):
+        self.frames_to_upstream += 1
+        self.bytes_to_upstream += size
+        self.meter.to_upstream(size)
+
+    def to_client(self, size: int, audio: bool = False):
+        self.frames_to_client += 1
+        self.bytes_to_client += size
+        self.meter.to_client(size)
+        if audio and self.first_audio_at is None:
+            self.first_audio_at = time.perf_counter()
+            self.first_audio_seconds.observe(self.first_audio_at - self.started_at)
+
+    def summary(self) -> dict:
+        return {
+            "duration_s": round(time.perf_counter() - self.started_at, 3),
+            "first_audio_ms": round((self.first_audio_at - self.started_at) * 1000, 1) if self.first_audio_at else None,
+            "frames_to_upstream": self.frames_to_upstream,
+            "bytes_to_upstream": self.bytes_to_upstream,
+            "frames_to_client": self.frames_to_client,
+            "bytes_to_client": self.bytes_to_client,
+        }
+
+
+class RelayAdapter:
+    """Provider-specific half of a realtime relay.
+
+    `Relay` owns admission, the two pump tasks, reconnects, teardown and metrics;
+    an adapter only knows how to talk to its upstream. `websocket` and `stats`
+    are set by `Relay` before `accept` is called.
+    """
+
+    provider = ""
+    websocket: WebSocket
+    stats: RelayStats
+
+    @property
+    def endpoint(self) -> str:
+        """Circuit breaker key; sessions sharing an upstream endpoint share a breaker."""
+        return self.provider
+
+    async def accept(self) -> bool:
+        """Accept the browser socket and read any handshake; False ends the session."""
+        await self.websocket.accept()
+        return True
+
+    async def connect(self):
+        """Open (or take from the session pool) the upstream session."""
+        raise NotImplementedError
+
+    async def from_client(self, message: dict) -> bool:
+        """Forward one ASGI websocket message upstream; False ends the session."""
+        raise NotImplementedError
+
+    async def to_client(self):
+        """Relay upstream traffic to the browser until the upstream ends.
+
+        Returning means the upstream finished the session; raising an error for
+        which `upstream_dropped` is true makes `Relay` call `reconnect`.
+        """
+        raise NotImplementedError
+
+    async def reconnect(self):
+        """Replace a dropped upstream: open a new session with the same configuration
+        and replay recent conversation context into it."""
+        raise NotImplementedError
+
+    async def close(self):
+        """Release the upstream session. Called exactly once, also after failures."""
+
+
+active_relays: Dict[int, "Relay"] = {}
+
+
+class UpstreamLost(Exception):
+    pass
+
+
+class Relay:
+    """Runs one browser <-> upstream session through a `RelayAdapter`.
+
+    The client and upstream pumps run as separate tasks; whichever finishes first
+    (a side closed or failed) cancels the other, so a session never lingers
+    half-open. The adapter is closed and the admission slot released on every path.
+
+    A transient upstream drop does not end the session: the upstream pump
+    reconnects with jittered backoff while the client pump holds incoming client
+    messages (up to RECONNECT_BUFFER_BYTES, oldest dropped first) and forwards
+    them once the new upstream is ready.
+    """
+
+    def __init__(self, websocket: WebSocket, adapter: RelayAdapter):
+        self.websocket = websocket
+        self.adapter = adapter
+        self.provider = adapter.provider
+        self.stats = RelayStats(adapter.provider)
+        self.closed_by: Optional[str] = None
+        self.breaker = breakers.get(adapter.endpoint)
+        self.upstream_ready = asyncio.Event()
+        self.held: Deque[tuple] = deque()
+        self.held_bytes = 0
+        self.held_dropped = 0
+        self.reconnects = 0
+        adapter.websocket = websocket
+        adapter.stats = self.stats
+
+    async def serve(self):
+        if not await admission.admit(self.provider):
+            await reject_websocket(self.websocket)
+            return
+
+        active_relays[id(self)] = self
+        close_code = NORMAL_CLOSURE
+        try:
+            if not await self.adapter.accept():
+                self.closed_by = "rejected"
+                return
+            start = time.perf_counter()
+            await self._connect(self.adapter.connect)
+            UPSTREAM_CONNECT_SECONDS.labels(self.provider).observe(time.perf_counter() - start)
+            self.upstream_ready.set()
+            await self._pump()
+        except WebSocketDisconnect:
+            self.closed_by = "client"
+        except CircuitOpen:
+            close_code = TRY_AGAIN_LATER
+            self.closed_by = "circuit_open"
+            logger.warning("%s circuit open for %s, refusing session", self.provider, self.adapter.endpoint)
+        except Exception as e:
+            close_code = INTERNAL_ERROR
+            self.closed_by = self.closed_by or "error"
+            logger.error("%s relay error: %s", self.provider, e)
+        finally:
+            active_relays.pop(id(self), None)
+            try:
+                await self.adapter.close()
+            except Exception as e:
+                logger.warning("Error closing %s upstream: %s", self.provider, e)
+            if self.closed_by not in ("client", "rejected"):
+                try:
+                    await self.websocket.close(code=close_code)
+                except Exception:
+                    pass
+            await admission.release(self.provider)
+            logger.info("Relay session closed", extra={"relay_session": self.summary()})
+
+    async def _connect(self, connect):
+        if not self.breaker.allow():
+            raise CircuitOpen(self.adapter.endpoint)
+        try:
+            await connect()
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+
+    async def _pump(self):
+        client_pump = asyncio.create_task(self._client_pump())
+        upstream_pump = asyncio.create_task(self._upstream_pump())
+        pumps = (client_pump, upstream_pump)
+        try:
+            done, _ = await asyncio.wait(pumps, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            for pump in pumps:
+                pump.cancel()
+            await asyncio.gather(*pumps, return_exceptions=True)
+        for pump in done:
+            error = pump.exception()
+            if isinstance(error, ConnectionClosed):
+                # Also raised by sends from the client pump once the upstream is gone.
+                self.closed_by = self.closed_by or "upstream"
+            elif error is not None and not isinstance(error, WebSocketDisconnect):
+                raise error
+        if self.closed_by is None:
+            self.closed_by = "upstream" if upstream_pump in done else "client"
+
+    async def _client_pump(self):
+        while True:
+            message = await self.websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                self.closed_by = "client"
+                return
+            data = message.get("bytes")
+            if data is None:
+                data = message.get("text") or ""
+            self.stats.to_upstream(len(data))
+            if not self.upstream_ready.is_set():
+                self._hold(message, len(data))
+                continue
+            try:
+                keep_going = await self.adapter.from_client(message)
+            except Exception as e:
+                if not upstream_dropped(e):
+                    raise
+                # The upstream pump sees the same drop and reconnects; resend this one after.
+                self.upstream_ready.clear()
+                self._hold(message, len(data))
+                continue
+            if not keep_going:
+                # The client asked to end the session but is still connected.
+                self.closed_by = "client_close"
+                return
+
+    def _hold(self, message: dict, size: int):
+        self.held.append((message, size))
+        self.held_bytes += size
+        while self.held_bytes > RECONNECT_BUFFER_BYTES and len(self.held) > 1:
+            _, dropped = self.held.popleft()
+            self.held_bytes -= dropped
+            self.held_dropped += 1
+
+    async def _upstream_pump(self):
+        while True:
+            try:
+                await self.adapter.to_client()
+                return
+            except Exception as e:
+                if not upstream_dropped(e):
+                    raise
+                error = e
+            self.upstream_ready.clear()
+            logger.warning("%s upstream dropped (%s), reconnecting", self.provider, error)
+            if not await self._reconnect():
+                self.closed_by = "upstream"
+                raise UpstreamLost(f"{self.provider} upstream lost after {self.reconnects} reconnect attempts") from error
+            if not await self._release_held():
+                self.closed_by = "client_close"
+                return
+            if not self.held:
+                self.upstream_ready.set()
+
+    async def _reconnect(self) -> bool:
+        for delay in backoff_delays():
+            await asyncio.sleep(delay)
+            self.reconnects += 1
+            try:
+                await self._connect(self.adapter.reconnect)
+            except Exception as e:
+                logger.warning("%s reconnect attempt %d failed: %s", self.provider, self.reconnects, e)
+                continue
+            UPSTREAM_RECONNECTS.labels(self.provider, "success").inc()
+            return True
+        UPSTREAM_RECONNECTS.labels(self.provider, "failure").inc()
+        return False
+
+    async def _release_held(self) -> bool:
+        """Forward held messages in order; False if one of them ended the session.
+
+        Messages keep arriving while this awaits, so the ready flag is only set
+        once the queue is empty. If the new upstream drops too, the rest stay
+        held for the next reconnect.
+        """
+        while self.held:
+            message, size = self.held.popleft()
+            self.held_bytes -= size
+            try:
+                keep_going = await self.adapter.from_client(message)
+            except Exception as e:
+                if not upstream_dropped(e):
+                    raise
+                self.held.appendleft((message, size))
+                self.held_bytes += size
+                return True
+            if not keep_going:
+                return False
+        return True
+
+    def summary(self) -> dict:
+        return {
+            "provider": self.provider,
+            "closed_by": self.closed_by,
+            "reconnects": self.reconnects,
+            "held_dropped": self.held_dropped,
+            **self.stats.summary(),
+        }
+
+
+def relay_summaries(provider: Optional[str] = None) -> List[dict]:
+    return [relay.summary() for relay in active_relays.values() if provider is None or relay.provider == provider]
@@ -0,0 +1,147 @@
+import asyncio
+import os
+import random
+import time
+from collections import deque
+from typing import Deque, Dict, Iterator, List, Tuple
+
+from websockets.exceptions import ConnectionClosed
+
+from core import config  # noqa: F401  (loads .env)
+
+RECONNECT_ATTEMPTS = int(os.getenv("RECONNECT_ATTEMPTS", "5"))
+RECONNECT_BASE_DELAY = float(os.getenv("RECONNECT_BASE_DELAY", "0.2"))
+RECONNECT_MAX_DELAY = float(os.getenv("RECONNECT_MAX_DELAY", "5"))
+# Client audio held while the upstream is reconnecting; 10 s of 16 kHz PCM16 by default.
+RECONNECT_BUFFER_BYTES = int(os.getenv("RECONNECT_BUFFER_BYTES", str(16000 * 2 * 10)))
+# Completed turns replayed into a replacement upstream session as context.
+REPLAY_TURNS = int(os.getenv("REPLAY_TURNS", "6"))
+
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+
+# Close codes after which the same session may succeed on a new connection:
+# going away, abnormal closure, internal error, service restart, try again later, bad gateway.
+RETRYABLE_CLOSE_CODES = frozenset((1001, 1006, 1011, 1012, 1013, 1014))
+
+
+def upstream_dropped(error: BaseException) -> bool:
+    """Whether `error` is a transient upstream failure worth reconnecting for.
+
+    A clean close (1000) or a policy/auth close means the upstream ended the
+    session on purpose, so those are not retried.
+    """
+    if isinstance(error, ConnectionClosed):
+        code = error.rcvd.code if error.rcvd is not None else 1006
+        return code in RETRYABLE_CLOSE_CODES
+    if isinstance(error, (OSError, asyncio.TimeoutError)):
+        return True
+    # SDK errors (e.g. google-genai's APIError) carry the websocket close code.
+    code = getattr(error, "code", None)
+    return isinstance(code, int) and code in RETRYABLE_CLOSE_CODES
+
+
+def backoff_delays(
+    attempts: int = RECONNECT_ATTEMPTS,
+    base: float = RECONNECT_BASE_DELAY,
+    cap: float = RECONNECT_MAX_DELAY,
+) -> Iterator[float]:
+    """Exponential backoff with full jitter, so sessions dropped together do not retry in lockstep."""
+    for attempt in range(attempts):
+        yield random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class CircuitOpen(Exception):
+    pass
+
+
+class CircuitBreaker:
+    """Stops connecting to an upstream endpoint that keeps failing.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    `allow()` refuses for `reset_seconds`; then a single probe is let through
+    (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        reset_seconds: float = CIRCUIT_RESET_SECONDS,
+    ):
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at: float = 0
+        self.probing = False
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        if self.failures < self.failure_threshold:
+            return "closed"
+        if time.monotonic() - self.opened_at < self.reset_seconds:
+            return "open"
+        return "half_open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.probing:
+            self.probing = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.probing = False
+
+    def record_failure(self):
+        self.probing = False
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            if self.failures == self.failure_threshold:
+                self.trips += 1
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {"state": self.state, "failures": self.failures, "trips": self.trips}
+
+
+class BreakerRegistry:
+    def __init__(self):
+        self.breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, endpoint: str) -> CircuitBreaker:
+        breaker = self.breakers.get(endpoint)
+        if breaker is None:
+            breaker = self.breakers[endpoint] = CircuitBreaker(endpoint)
+        return breaker
+
+    def open_endpoints(self) -> Dict[Tuple[str, ...], float]:
+        return {(endpoint,): float(breaker.state != "closed") for endpoint, breaker in self.breakers.items()}
+
+    def stats(self) -> dict:
+        return {endpoint: breaker.stats() for endpoint, breaker in self.breakers.items()}
+
+
+breakers = BreakerRegistry()
+
+
+class RecentTurns:
+    """The last few completed turns as (role, text), for replaying into a new upstream session."""
+
+    def __init__(self, max_turns: int = REPLAY_TURNS):
+        self.turns: Deque[Tuple[str, str]] = deque(maxlen=max_turns)
+
+    def add(self, role: str, text: str):
+        if text:
+            self.turns.append((role, text))
+
+    def items(self) -> List[Tuple[str, str]]:
+        return list(self.turns)
+
+    def __bool__(self) -> bool:
+        return bool(self.turns)
@@ -0,0 +1,237 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from core import config  # noqa: F401  (loads .env)
+
+logger = logging.getLogger(__name__)
+
+SESSION_POOL_ENABLED = os.getenv("SESSION_POOL_ENABLED", "false").lower() == "true"
+SESSION_POOL_TARGET_SIZE = int(os.getenv("SESSION_POOL_TARGET_SIZE", "2"))
+SESSION_POOL_IDLE_TIMEOUT = float(os.getenv("SESSION_POOL_IDLE_TIMEOUT", "60"))
+SESSION_POOL_CHECK_INTERVAL = float(os.getenv("SESSION_POOL_CHECK_INTERVAL", "10"))
+# Keys nobody asked for in this long go dormant (idle sessions closed) until used again.
+SESSION_POOL_KEY_TTL = float(os.getenv("SESSION_POOL_KEY_TTL", "600"))
+# Distinct configurations that may be registered with `warm`.
+SESSION_POOL_MAX_KEYS = int(os.getenv("SESSION_POOL_MAX_KEYS", "8"))
+
+Closer = Callable[[], Awaitable[Any]]
+Factory = Callable[[], Awaitable[Tuple[Any, Closer]]]
+HealthCheck = Callable[[Any], Awaitable[bool]]
+AliveCheck = Callable[[Any], bool]
+
+
+def websocket_open(ws) -> bool:
+    """Cheap synchronous liveness check used when handing a session out."""
+    return ws is not None and getattr(ws, "close_code", None) is None
+
+
+async def websocket_healthy(ws, timeout: float = 5) -> bool:
+    """Health check for a raw `websockets` connection: still open and answering pings."""
+    if not websocket_open(ws):
+        return False
+    try:
+        pong = await ws.ping()
+        await asyncio.wait_for(pong, timeout)
+    except Exception:
+        return False
+    return True
+
+
+class _Idle:
+    __slots__ = ("session", "close", "created_at")
+
+    def __init__(self, session: Any, close: Closer):
+        self.session = session
+        self.close = close
+        self.created_at = time.monotonic()
+
+
+class _KeySpec:
+    __slots__ = ("factory", "health", "alive", "last_used", "idle", "filling")
+
+    def __init__(self, factory: Factory, health: Optional[HealthCheck], alive: Optional[AliveCheck]):
+        self.factory = factory
+        self.health = health
+        self.alive = alive
+        self.last_used = time.monotonic()
+        self.idle: List[_Idle] = []
+        self.filling = 0
+
+
+class SessionPool:
+    """Keeps pre-connected, pre-configured upstream realtime sessions ready to hand out.
+
+    Sessions are single-use: `acquire` transfers ownership to the caller, who closes
+    it with the returned closer. Only keys registered with `warm` (at startup, from
+    each provider's allow-list, at most `max_keys`) are pooled and topped back up to
+    `target_size` in the background; `acquire` for any other key, which may come
+    from client input, just connects directly. A key unused for `key_ttl` goes
+    dormant until its next `acquire`.
+    `health` (e.g. a ping) runs from the maintenance loop; `acquire` itself only
+    runs the cheap synchronous `alive` check so a hand-out never waits on I/O.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = SESSION_POOL_ENABLED,
+        target_size: int = SESSION_POOL_TARGET_SIZE,
+        idle_timeout: float = SESSION_POOL_IDLE_TIMEOUT,
+        check_interval: float = SESSION_POOL_CHECK_INTERVAL,
+        key_ttl: float = SESSION_POOL_KEY_TTL,
+        max_keys: int = SESSION_POOL_MAX_KEYS,
+    ):
+        self.enabled = enabled
+        self.target_size = target_size
+        self.idle_timeout = idle_timeout
+        self.check_interval = check_interval
+        self.key_ttl = key_ttl
+        self.max_keys = max_keys
+        self.keys: Dict[Hashable, _KeySpec] = {}
+        self.task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.failures = 0
+        self.bypassed = 0
+        self.background = set()
+
+    async def start(self):
+        if self.enabled and self.task is None:
+            self.task = asyncio.create_task(self._maintain())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        for task in list(self.background):
+            task.cancel()
+        for spec in self.keys.values():
+            idle, spec.idle = spec.idle, []
+            for entry in idle:
+                await self._close(entry)
+        self.keys.clear()
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self.background.add(task)
+        task.add_done_callback(self.background.discard)
+
+    def warm(
+        self,
+        key: Hashable,
+        factory: Factory,
+        health: Optional[HealthCheck] = None,
+        alive: Optional[AliveCheck] = None,
+    ):
+        """Register `key` for pooling and start filling it."""
+        if not self.enabled:
+            return
+        spec = self.keys.get(key)
+        if spec is None:
+            if len(self.keys) >= self.max_keys:
+                logger.warning("Session pool already has %d keys, not warming %s", self.max_keys, key)
+                return
+            spec = self.keys[key] = _KeySpec(factory, health, alive)
+        self._refill(key, spec)
+
+    async def acquire(
+        self,
+        key: Hashable,
+        factory: Factory,
+        health: Optional[HealthCheck] = None,
+        alive: Optional[AliveCheck] = None,
+    ) -> Tuple[Any, Closer]:
+        if not self.enabled:
+            return await factory()
+        spec = self.keys.get(key)
+        if spec is None:
+            self.bypassed += 1
+            return await factory()
+
+        spec.last_used = time.monotonic()
+
+        try:
+            while spec.idle:
+                entry = spec.idle.pop()
+                expired = time.monotonic() - entry.created_at > self.idle_timeout
+                if expired or (spec.alive is not None and not spec.alive(entry.session)):
+                    self.evictions += 1
+                    self._spawn(self._close(entry))
+                    continue
+                self.hits += 1
+                return entry.session, entry.close
+
+            self.misses += 1
+            return await factory()
+        finally:
+            self._refill(key, spec)
+
+    def _refill(self, key: Hashable, spec: _KeySpec):
+        missing = self.target_size - len(spec.idle) - spec.filling
+        for _ in range(max(missing, 0)):
+            spec.filling += 1
+            self._spawn(self._fill_one(key, spec))
+
+    async def _fill_one(self, key: Hashable, spec: _KeySpec):
+        try:
+            session, close = await spec.factory()
+        except Exception as e:
+            self.failures += 1
+            logger.warning("Failed to pre-warm upstream session: %s", e)
+            return
+        finally:
+            spec.filling -= 1
+        if self.keys.get(key) is not spec:
+            await close()
+            return
+        spec.idle.append(_Idle(session, close))
+
+    async def _close(self, entry: _Idle):
+        try:
+            await entry.close()
+        except Exception as e:
+            logger.debug("Error closing pooled session: %s", e)
+
+    async def _maintain(self):
+        while True:
+            await asyncio.sleep(self.check_interval)
+            now = time.monotonic()
+            for key, spec in list(self.keys.items()):
+                if now - spec.last_used > self.key_ttl:
+                    # Dormant: stop paying for idle upstream sessions nobody is using;
+                    # the next `acquire` connects directly and refills.
+                    idle, spec.idle = spec.idle, []
+                    for entry in idle:
+                        await self._close(entry)
+                    continue
+
+                for entry in list(spec.idle):
+                    healthy = now - entry.created_at <= self.idle_timeout and (
+                        spec.health is None or await spec.health(entry.session)
+                    )
+                    # Skip sessions acquired while the health check was awaiting.
+                    if not healthy and entry in spec.idle:
+                        spec.idle.remove(entry)
+                        self.evictions += 1
+                        await self._close(entry)
+                self._refill(key, spec)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "keys": len(self.keys),
+            "max_keys": self.max_keys,
+            "idle": sum(len(spec.idle) for spec in self.keys.values()),
+            "filling": sum(spec.filling for spec in self.keys.values()),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "failures": self.failures,
+            "bypassed": self.bypassed,
+        }
+
+
+session_pool = SessionPool()
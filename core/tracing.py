@@ -0,0 +1,184 @@
+import logging
+import os
+import time
+from typing import List, Optional
+
+from core import config  # noqa: F401  (loads .env)
+from core.metrics import TURN_LATENCY_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# "none" (default) records only the per-session summary; "otel" also emits
+# OpenTelemetry spans through whatever SDK/exporter the process configured.
+TRACING_BACKEND = os.getenv("TRACING_BACKEND", "none").lower()
+
+
+class _NoopSpan:
+    def add_event(self, name: str, attributes: Optional[dict] = None):
+        pass
+
+    def set_attribute(self, key: str, value):
+        pass
+
+    def end(self):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class _NoopTracer:
+    def start_span(self, name: str, attributes: Optional[dict] = None, parent=None):
+        return NOOP_SPAN
+
+
+class _OtelTracer:
+    def __init__(self):
+        from opentelemetry import trace
+
+        self.trace = trace
+        self.tracer = trace.get_tracer("all_api.realtime")
+
+    def start_span(self, name: str, attributes: Optional[dict] = None, parent=None):
+        context = self.trace.set_span_in_context(parent) if parent is not None else None
+        return self.tracer.start_span(name, context=context, attributes=attributes)
+
+
+def build_tracer(backend: str = TRACING_BACKEND):
+    if backend == "otel":
+        try:
+            return _OtelTracer()
+        except ImportError:
+            logger.warning("TRACING_BACKEND=otel but opentelemetry-api is not installed; tracing disabled")
+    return _NoopTracer()
+
+
+tracer = build_tracer()
+
+
+def _attributes(**values) -> dict:
+    # OpenTelemetry rejects None attribute values.
+    return {key: value for key, value in values.items() if value is not None}
+
+
+class TurnTracer:
+    """Per-session turn timing: last user audio in -> first response audio out.
+
+    A turn starts with the first user audio chunk after the previous
+    `response.done` and ends at the next `response.done`. Its span carries one
+    event per stage (client receive, upstream send, first upstream delta, first
+    client send, response done); per-chunk calls only update timestamps.
+    """
+
+    def __init__(self, provider: str, client_id: str, conversation_id: Optional[str] = None):
+        self.provider = provider
+        self.client_id = client_id
+        self.conversation_id = conversation_id
+        self.started_at = time.perf_counter()
+        self.session_span = tracer.start_span(
+            f"{provider}.realtime.session",
+            attributes=_attributes(client_id=client_id, conversation_id=conversation_id),
+        )
+        self.turn_span = None
+        self.turns = 0
+        self.latencies: List[float] = []
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.closed = False
+        self._reset_turn()
+
+    def _reset_turn(self):
+        self.turn_span = None
+        self.last_receive_at: Optional[float] = None
+        self.upstream_sent = False
+        self.first_delta_at: Optional[float] = None
+        self.first_send_at: Optional[float] = None
+
+    def _start_turn(self):
+        self.turns += 1
+        self.turn_span = tracer.start_span(
+            f"{self.provider}.realtime.turn",
+            attributes=_attributes(client_id=self.client_id, conversation_id=self.conversation_id, turn=self.turns),
+            parent=self.session_span,
+        )
+
+    def client_receive(self):
+        """A chunk of user audio arrived from the client."""
+        if self.turn_span is None:
+            self._start_turn()
+            self.turn_span.add_event("client.receive")
+        # Audio after the response started belongs to the next turn's input.
+        if self.first_delta_at is None:
+            self.last_receive_at = time.perf_counter()
+
+    def upstream_send(self):
+        """User audio was written to the upstream socket."""
+        if not self.upstream_sent and self.turn_span is not None:
+            self.upstream_sent = True
+            self.turn_span.add_event("upstream.send")
+
+    def upstream_delta(self):
+        """An audio delta arrived from upstream."""
+        if self.first_delta_at is not None:
+            return
+        if self.turn_span is None:
+            # A response nobody spoke for, e.g. the greeting sent on connect.
+            self._start_turn()
+        self.first_delta_at = time.perf_counter()
+        self.turn_span.add_event("upstream.first_delta")
+
+    def client_send(self):
+        """An audio delta was handed to the client's send queue."""
+        if self.first_send_at is not None or self.first_delta_at is None:
+            return
+        self.first_send_at = time.perf_counter()
+        self.turn_span.add_event("client.first_send")
+        if self.last_receive_at is not None:
+            latency = self.first_send_at - self.last_receive_at
+            self.latencies.append(latency)
+            TURN_LATENCY_SECONDS.labels(self.provider).observe(latency)
+            self.turn_span.set_attribute("voice.latency_ms", round(latency * 1000, 1))
+
+    def response_done(self, usage: Optional[dict] = None):
+        usage = usage or {}
+        self.input_tokens += usage.get("input_tokens", 0)
+        self.output_tokens += usage.get("output_tokens", 0)
+        if self.turn_span is None:
+            return
+        self.turn_span.add_event("response.done")
+        self.turn_span.set_attribute("tokens.input", usage.get("input_tokens", 0))
+        self.turn_span.set_attribute("tokens.output", usage.get("output_tokens", 0))
+        self.turn_span.end()
+        self._reset_turn()
+
+    def summary(self) -> dict:
+        latencies = sorted(self.latencies)
+        return {
+            "provider": self.provider,
+            "client_id": self.client_id,
+            "conversation_id": self.conversation_id,
+            "duration_s": round(time.perf_counter() - self.started_at, 3),
+            "turns": self.turns,
+            "measured_turns": len(latencies),
+            "latency_ms_p50": round(latencies[len(latencies) // 2] * 1000, 1) if latencies else None,
+            "latency_ms_max": round(latencies[-1] * 1000, 1) if latencies else None,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+        }
+
+    def close(self) -> dict:
+        """End any open spans and log the per-session summary."""
+        if self.closed:
+            return self.summary()
+        self.closed = True
+        if self.turn_span is not None:
+            self.turn_span.set_attribute("interrupted", True)
+            self.turn_span.end()
+            self._reset_turn()
+        summary = self.summary()
+        for key, value in summary.items():
+            if value is not None:
+                self.session_span.set_attribute(key, value)
+        self.session_span.end()
+        logger.info("Realtime session summary", extra={"session_summary": summary})
+        return summary
@@ -0,0 +1,116 @@
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from core import config  # noqa: F401  (loads .env)
+
+MAX_ENTRIES = int(os.getenv("ELEVENLABS_CACHE_MAX_ENTRIES", "1024"))
+
+# Seconds each read-only route may be served from cache.
+ROUTE_TTLS = {
+    "agents-list": float(os.getenv("ELEVENLABS_CACHE_TTL_AGENTS_LIST", "10")),
+    "detail-agent": float(os.getenv("ELEVENLABS_CACHE_TTL_DETAIL_AGENT", "30")),
+    "conversation-list": float(os.getenv("ELEVENLABS_CACHE_TTL_CONVERSATION_LIST", "5")),
+    "detail-conversation": float(os.getenv("ELEVENLABS_CACHE_TTL_DETAIL_CONVERSATION", "30")),
+}
+
+# Routes whose entries go stale when an agent is created or deleted.
+AGENT_ROUTES = ("agents-list", "detail-agent")
+
+CacheKey = Tuple[str, str, Tuple[str, ...]]
+
+
+def hash_apikey(apikey: str) -> str:
+    return hashlib.sha256(apikey.encode("utf-8")).hexdigest()
+
+
+def _consume_exception(task: asyncio.Task):
+    # Every waiter may have gone away; mark the failure as retrieved either way.
+    if not task.cancelled():
+        task.exception()
+
+
+class ResponseCache:
+    """LRU cache of upstream JSON bodies with per-route TTLs and single-flight misses."""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, ttls: Dict[str, float] = ROUTE_TTLS):
+        self.max_entries = max_entries
+        self.ttls = ttls
+        self.entries: "OrderedDict[CacheKey, Tuple[float, Any]]" = OrderedDict()
+        self.inflight: Dict[CacheKey, asyncio.Task] = {}
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.coalesced = 0
+
+    def make_key(self, apikey: str, route: str, *params: str) -> CacheKey:
+        return (hash_apikey(apikey), route, tuple(params))
+
+    async def get_or_fetch(self, key: CacheKey, fetch: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self.entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self.entries[key]
+
+        task = self.inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        else:
+            self.misses += 1
+            # The fetch runs detached: a caller that goes away (client disconnect)
+            # cancels only its own wait, never the fetch other callers share.
+            task = asyncio.create_task(self._fetch(key, fetch, self.generation))
+            task.add_done_callback(_consume_exception)
+            self.inflight[key] = task
+        return await asyncio.shield(task)
+
+    async def _fetch(self, key: CacheKey, fetch: Callable[[], Awaitable[Any]], generation: int) -> Any:
+        try:
+            value = await fetch()
+        finally:
+            if self.inflight.get(key) is asyncio.current_task():
+                del self.inflight[key]
+        # Anything invalidated while we were fetching must not be re-cached.
+        if generation == self.generation:
+            self._store(key, value)
+        return value
+
+    def _store(self, key: CacheKey, value: Any):
+        ttl = self.ttls.get(key[1], 0)
+        if ttl <= 0:
+            return
+        self.entries[key] = (time.monotonic() + ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, apikey: str, routes: Tuple[str, ...]):
+        apikey_hash = hash_apikey(apikey)
+        self.generation += 1
+        for key in [k for k in self.entries if k[0] == apikey_hash and k[1] in routes]:
+            del self.entries[key]
+        for key in [k for k in self.inflight if k[0] == apikey_hash and k[1] in routes]:
+            del self.inflight[key]
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self.entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "inflight": len(self.inflight),
+        }
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,69 @@
+import os
+from typing import Optional
+
+import httpx
+
+from core import config  # noqa: F401  (loads .env)
+
+BASE_URL = "https://api.elevenlabs.io/v1/convai"
+
+MAX_CONNECTIONS = int(os.getenv("ELEVENLABS_MAX_CONNECTIONS", "100"))
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("ELEVENLABS_MAX_KEEPALIVE_CONNECTIONS", "20"))
+KEEPALIVE_EXPIRY = float(os.getenv("ELEVENLABS_KEEPALIVE_EXPIRY", "30"))
+CONNECT_TIMEOUT = float(os.getenv("ELEVENLABS_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("ELEVENLABS_READ_TIMEOUT", "30"))
+WRITE_TIMEOUT = float(os.getenv("ELEVENLABS_WRITE_TIMEOUT", "30"))
+POOL_TIMEOUT = float(os.getenv("ELEVENLABS_POOL_TIMEOUT", "10"))
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def _http2_available() -> bool:
+    # httpx only speaks HTTP/2 when the optional `h2` package is installed.
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _build_client() -> httpx.AsyncClient:
+    # All ElevenLabs calls go to a single host, so the pool limits are
+    # effectively per-host limits.
+    return httpx.AsyncClient(
+        base_url=BASE_URL,
+        http2=_http2_available(),
+        limits=httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(
+            connect=CONNECT_TIMEOUT,
+            read=READ_TIMEOUT,
+            write=WRITE_TIMEOUT,
+            pool=POOL_TIMEOUT,
+        ),
+        headers={"Content-Type": "application/json"},
+    )
+
+
+async def startup():
+    global _client
+    if _client is None:
+        _client = _build_client()
+
+
+async def shutdown():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared upstream client, creating it if the app lifespan has not run."""
+    global _client
+    if _client is None:
+        _client = _build_client()
+    return _client
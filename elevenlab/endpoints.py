@@ -1,154 +1,155 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect , HTTPException , Header
-import asyncio
-import websockets
-from schema import CreateAgentRequest
-import requests
+from fastapi import APIRouter, WebSocket, HTTPException , Header
+from elevenlab.schema import CreateAgentRequest
+from elevenlab.client import get_client, startup, shutdown  # noqa: F401  (lifespan hooks)
+from elevenlab.cache import response_cache, AGENT_ROUTES
+from core.relay import Relay, relay_summaries
+from elevenlab.proxy import ElevenLabsAdapter
 
 
-app = FastAPI()
+router = APIRouter()
 
 
-@app.websocket("/ws/{agent_id}")
+@router.websocket("/ws/{agent_id}")
 async def websocket_proxy(websocket: WebSocket, agent_id: str):
-    TARGET_WS_URL = f"wss://api.elevenlabs.io/v1/convai/conversation?agent_id={agent_id}"
+    await Relay(websocket, ElevenLabsAdapter(agent_id)).serve()
 
-    await websocket.accept()
-    try:
-        async with websockets.connect(TARGET_WS_URL) as target_ws:
-            async def forward_client_to_target():
-                while True:
-                    data = await websocket.receive_text()
-                    await target_ws.send(data)
 
-            async def forward_target_to_client():
-                while True:
-                    data = await target_ws.recv()
-                    await websocket.send_text(data)
+@router.get("/ws-stats")
+def get_ws_stats():
+    return relay_summaries("elevenlabs")
 
-            await asyncio.gather(
-                forward_client_to_target(),
-                forward_target_to_client()
-            )
-    except WebSocketDisconnect:
-        print("Client disconnected")
-    except Exception as e:
-        await websocket.close()
-        print("Proxy error:", e)
 
 
+@router.post("/create_agent")
+async def create_agent(request: CreateAgentRequest , apikey: str = Header(...)):
 
-@app.post("/create_agent")
-def create_agent(request: CreateAgentRequest , apikey: str = Header(...)):
-
-    TARGET_URL = "https://api.elevenlabs.io/v1/convai/agents/create"
+    TARGET_URL = "/agents/create"
 
     headers = {
-        "Content-Type": "application/json",
         'xi-api-key' : apikey
     }
     
-    response = requests.post(TARGET_URL, json=request.dict() , headers=headers)
+    response = await get_client().post(TARGET_URL, json=request.dict() , headers=headers)
     
     if response.status_code != 200:
         raise HTTPException(status_code=response.status_code, detail=response.text)
     
+    response_cache.invalidate(apikey, AGENT_ROUTES)
     return response.json()
 
 
 
-@app.get("/agents-list")
-def get_agents(apikey: str = Header(...)):
-    TARGET_URL = "https://api.elevenlabs.io/v1/convai/agents"
+@router.get("/agents-list")
+async def get_agents(apikey: str = Header(...)):
+    TARGET_URL = "/agents"
     
     # Gunakan nilai apikey dari header
     headers = {
-        "Content-Type": "application/json",
         "xi-api-key": apikey
     }
     
-    response = requests.get(TARGET_URL, headers=headers)
-    
-    if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=response.text)
-    
-    return response.json()
+    async def fetch():
+        response = await get_client().get(TARGET_URL, headers=headers)
+
+        if response.status_code != 200:
+            raise HTTPException(status_code=response.status_code, detail=response.text)
+
+        return response.json()
 
+    key = response_cache.make_key(apikey, "agents-list")
+    return await response_cache.get_or_fetch(key, fetch)
 
 
 
-@app.get("/detail-agent/{agent_id}")
-def get_detail_agent(agent_id : str , apikey: str = Header(...)):
 
-    TARGET_URL = f"https://api.elevenlabs.io/v1/convai/agents/{agent_id}"
+@router.get("/detail-agent/{agent_id}")
+async def get_detail_agent(agent_id : str , apikey: str = Header(...)):
+
+    TARGET_URL = f"/agents/{agent_id}"
 
     headers = {
-        "Content-Type": "application/json",
         'xi-api-key'  : apikey
     }
     
-    response = requests.get(TARGET_URL, headers=headers)
-    
-    if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=response.text)
-    
-    return response.json()
+    async def fetch():
+        response = await get_client().get(TARGET_URL, headers=headers)
+
+        if response.status_code != 200:
+            raise HTTPException(status_code=response.status_code, detail=response.text)
 
+        return response.json()
 
+    key = response_cache.make_key(apikey, "detail-agent", agent_id)
+    return await response_cache.get_or_fetch(key, fetch)
 
 
 
-@app.get("/conversation-list")
-def get_conversation(apikey: str = Header(...)):
 
-    TARGET_URL = "https://api.elevenlabs.io/v1/convai/conversations"
+
+@router.get("/conversation-list")
+async def get_conversation(apikey: str = Header(...)):
+
+    TARGET_URL = "/conversations"
 
     headers = {
-        "Content-Type": "application/json",
         'xi-api-key'  : apikey
     }
     
-    response = requests.get(TARGET_URL, headers=headers)
-    
-    if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=response.text)
-    
-    return response.json()
+    async def fetch():
+        response = await get_client().get(TARGET_URL, headers=headers)
+
+        if response.status_code != 200:
+            raise HTTPException(status_code=response.status_code, detail=response.text)
+
+        return response.json()
 
+    key = response_cache.make_key(apikey, "conversation-list")
+    return await response_cache.get_or_fetch(key, fetch)
 
 
-@app.get("/detail-conversation/{conversation_id}")
-def get_detail_conversation(conversation_id: str , apikey: str = Header(...)):
 
-    TARGET_URL = f"https://api.elevenlabs.io/v1/convai/conversations/{conversation_id}"
+@router.get("/detail-conversation/{conversation_id}")
+async def get_detail_conversation(conversation_id: str , apikey: str = Header(...)):
+
+    TARGET_URL = f"/conversations/{conversation_id}"
 
     headers = {
-        "Content-Type": "application/json",
         'xi-api-key'  : apikey
     }
     
-    response = requests.get(TARGET_URL, headers=headers)
-    
-    if response.status_code != 200:
-        raise HTTPException(status_code=response.status_code, detail=response.text)
-    
-    return response.json()
+    async def fetch():
+        response = await get_client().get(TARGET_URL, headers=headers)
+
+        if response.status_code != 200:
+            raise HTTPException(status_code=response.status_code, detail=response.text)
+
+        return response.json()
+
+    key = response_cache.make_key(apikey, "detail-conversation", conversation_id)
+    return await response_cache.get_or_fetch(key, fetch)
 
 
 
 
 
 
-@app.delete("/agent/{agent_id}")
-def delete_agent(agent_id: str , apikey: str = Header(...)):
-    url = f"https://api.elevenlabs.io/v1/convai/agents/{agent_id}"
+@router.delete("/agent/{agent_id}")
+async def delete_agent(agent_id: str , apikey: str = Header(...)):
+    url = f"/agents/{agent_id}"
     headers = {
-        'xi-api-key'  : apikey,
-        "Content-Type": "application/json"
+        'xi-api-key'  : apikey
     }
     
-    response = requests.delete(url, headers=headers)
+    response = await get_client().delete(url, headers=headers)
     
     if response.status_code != 200:
         raise HTTPException(status_code=response.status_code, detail=response.text)
     
+    response_cache.invalidate(apikey, AGENT_ROUTES)
     return {"message": "Agent deleted successfully"}
+
+
+
+@router.get("/cache-stats")
+async def get_cache_stats():
+    return response_cache.stats()
@@ -0,0 +1,103 @@
+import json
+import os
+from contextlib import suppress
+from urllib.parse import urlsplit
+
+from core import config  # noqa: F401  (loads .env)
+from core.relay import RelayAdapter, connect_websocket
+from core.resilience import RecentTurns
+
+CONVERSATION_URL = os.getenv(
+    "ELEVENLABS_CONVERSATION_URL", "wss://api.elevenlabs.io/v1/convai/conversation?agent_id={agent_id}"
+)
+
+# Audio travels as base64 JSON or raw PCM; per-message deflate costs CPU for almost no gain.
+WS_COMPRESSION = os.getenv("ELEVENLABS_WS_COMPRESSION", "none").lower()
+WS_MAX_SIZE = int(os.getenv("ELEVENLABS_WS_MAX_SIZE", str(2 ** 20)))
+# Small receive queue: a slow client pushes back on the upstream instead of buffering audio.
+WS_MAX_QUEUE = int(os.getenv("ELEVENLABS_WS_MAX_QUEUE", "16"))
+WS_WRITE_LIMIT = int(os.getenv("ELEVENLABS_WS_WRITE_LIMIT", "65536"))
+WS_OPEN_TIMEOUT = float(os.getenv("ELEVENLABS_WS_OPEN_TIMEOUT", "10"))
+WS_PING_INTERVAL = float(os.getenv("ELEVENLABS_WS_PING_INTERVAL", "20"))
+WS_PING_TIMEOUT = float(os.getenv("ELEVENLABS_WS_PING_TIMEOUT", "20"))
+WS_CLOSE_TIMEOUT = float(os.getenv("ELEVENLABS_WS_CLOSE_TIMEOUT", "2"))
+
+
+def connect_upstream(agent_id: str):
+    return connect_websocket(
+        CONVERSATION_URL.format(agent_id=agent_id),
+        compression=None if WS_COMPRESSION == "none" else WS_COMPRESSION,
+        max_size=WS_MAX_SIZE,
+        max_queue=WS_MAX_QUEUE,
+        write_limit=WS_WRITE_LIMIT,
+        open_timeout=WS_OPEN_TIMEOUT,
+        ping_interval=WS_PING_INTERVAL,
+        ping_timeout=WS_PING_TIMEOUT,
+        close_timeout=WS_CLOSE_TIMEOUT,
+    )
+
+
+class ElevenLabsAdapter(RelayAdapter):
+    """Passes text and binary frames through unchanged in both directions.
+
+    An ElevenLabs conversation starts as soon as its socket opens, so the
+    upstream is always opened per client rather than taken from a pool. For the
+    same reason a reconnect starts a new conversation; the recent transcript is
+    sent into it as a `contextual_update`.
+    """
+
+    provider = "elevenlabs"
+
+    def __init__(self, agent_id: str):
+        self.agent_id = agent_id
+        self.upstream = None
+        self.turns = RecentTurns()
+
+    @property
+    def endpoint(self) -> str:
+        return urlsplit(CONVERSATION_URL).netloc
+
+    async def connect(self):
+        self.upstream = await connect_upstream(self.agent_id)
+
+    async def reconnect(self):
+        if self.upstream is not None:
+            with suppress(Exception):
+                await self.upstream.close()
+        self.upstream = None
+        await self.connect()
+        if self.turns:
+            transcript = "\n".join(f"{role}: {text}" for role, text in self.turns.items())
+            await self.upstream.send(json.dumps({
+                "type": "contextual_update",
+                "text": "The call was briefly interrupted. Conversation so far:\n" + transcript,
+            }))
+
+    async def from_client(self, message: dict) -> bool:
+        data = message.get("bytes")
+        await self.upstream.send(data if data is not None else message["text"])
+        return True
+
+    async def to_client(self):
+        async for data in self.upstream:
+            if isinstance(data, str):
+                # Only scan for audio until the first chunk has been seen.
+                self.stats.to_client(len(data), audio=self.stats.awaiting_audio and '"audio_event"' in data)
+                await self.websocket.send_text(data)
+                if '"user_transcript"' in data or '"agent_response"' in data:
+                    self.remember(data)
+            else:
+                self.stats.to_client(len(data), audio=True)
+                await self.websocket.send_bytes(data)
+
+    def remember(self, data: str):
+        # Transcript events are rare next to audio, so only they are parsed.
+        event = json.loads(data)
+        if event.get("type") == "user_transcript":
+            self.turns.add("user", event.get("user_transcription_event", {}).get("user_transcript", ""))
+        elif event.get("type") == "agent_response":
+            self.turns.add("agent", event.get("agent_response_event", {}).get("agent_response", ""))
+
+    async def close(self):
+        if self.upstream is not None:
+            await self.upstream.close()
@@ -0,0 +1,146 @@
+import asyncio
+import base64
+import json
+import os
+from typing import List, Optional
+
+import httpx
+from fastapi import HTTPException, Request
+from google.genai import errors
+
+from core import config  # noqa: F401  (loads .env)
+from core.resilience import backoff_delays
+from gemini.image import generate_image_bytes, sniff_image_type, IMAGE_MODEL, GENERATE_CONTENT_CONFIG_KEY
+from gemini.image_cache import image_cache, cache_key
+
+BATCH_PARALLELISM = int(os.getenv("GEMINI_BATCH_PARALLELISM", "4"))
+BATCH_MAX_PARALLELISM = int(os.getenv("GEMINI_BATCH_MAX_PARALLELISM", "16"))
+BATCH_RETRIES = int(os.getenv("GEMINI_BATCH_RETRIES", "2"))
+BATCH_MAX_ITEMS = int(os.getenv("GEMINI_BATCH_MAX_ITEMS", "100"))
+BATCH_RETRY_BASE_DELAY = float(os.getenv("GEMINI_BATCH_RETRY_BASE_DELAY", "0.5"))
+BATCH_RETRY_MAX_DELAY = float(os.getenv("GEMINI_BATCH_RETRY_MAX_DELAY", "8"))
+
+
+class BatchItem:
+    __slots__ = ("index", "id", "image_bytes", "mime_type", "prompt")
+
+    def __init__(self, index: int, id: Optional[str], image_bytes: bytes, mime_type: str, prompt: str):
+        self.index = index
+        self.id = id
+        self.image_bytes = image_bytes
+        self.mime_type = mime_type
+        self.prompt = prompt
+
+
+async def parse_batch(request: Request) -> List[BatchItem]:
+    """Read batch items from multipart (`files` + `prompts`) or NDJSON bodies.
+
+    Multipart takes one prompt per file, or a single prompt shared by all files.
+    NDJSON takes one object per line: `{"id", "image_base64", "mime_type", "prompt"}`.
+    """
+    content_type = request.headers.get("content-type", "")
+    items = []
+    if content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        files = form.getlist("files")
+        prompts = form.getlist("prompts")
+        if len(prompts) == 1:
+            prompts = prompts * len(files)
+        if not files or len(prompts) != len(files):
+            raise HTTPException(status_code=422, detail="Expected 'files' with one 'prompts' value per file (or a single shared prompt)")
+        for index, (upload, prompt) in enumerate(zip(files, prompts)):
+            items.append(BatchItem(index, upload.filename, await upload.read(), upload.content_type or "image/jpeg", prompt))
+    elif content_type.startswith("application/x-ndjson"):
+        body = await request.body()
+        for index, line in enumerate(line for line in body.splitlines() if line.strip()):
+            try:
+                data = json.loads(line)
+                items.append(BatchItem(
+                    index,
+                    data.get("id"),
+                    base64.b64decode(data["image_base64"]),
+                    data.get("mime_type", "image/jpeg"),
+                    data["prompt"],
+                ))
+            except Exception as e:
+                raise HTTPException(status_code=422, detail=f"Invalid batch line {index}: {str(e)}")
+    else:
+        raise HTTPException(status_code=415, detail="Use multipart/form-data or application/x-ndjson")
+
+    if len(items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_ITEMS} items per batch")
+    return items
+
+
+def _retryable(error: BaseException) -> bool:
+    """Timeouts, connection failures, 429 and 5xx; anything else fails the item at once."""
+    if isinstance(error, (asyncio.TimeoutError, OSError, httpx.TransportError)):
+        return True
+    if isinstance(error, errors.APIError):
+        return isinstance(error.code, int) and (error.code == 429 or error.code >= 500)
+    return False
+
+
+async def _generate_item(api_key: str, item: BatchItem, retries: int) -> dict:
+    key = None
+    if image_cache.enabled:
+        key = cache_key(item.image_bytes, item.prompt, IMAGE_MODEL, GENERATE_CONTENT_CONFIG_KEY)
+        cached = await asyncio.to_thread(image_cache.get, key)
+        if cached is not None:
+            with cached:
+                image_base64 = base64.b64encode(cached).decode("utf-8")
+                mime_type = sniff_image_type(cached)
+            return {"status": "ok", "cache": "HIT", "attempts": 0, "mime_type": mime_type, "image_base64": image_base64}
+
+    delays = backoff_delays(retries, BATCH_RETRY_BASE_DELAY, BATCH_RETRY_MAX_DELAY)
+    attempts = 0
+    while True:
+        attempts += 1
+        try:
+            image_bytes, mime_type = await generate_image_bytes(api_key, item.image_bytes, item.mime_type, item.prompt)
+        except asyncio.TimeoutError:
+            error, retry = "Image generation timed out", True
+        except Exception as e:
+            error, retry = f"Image generation failed: {str(e)}", _retryable(e)
+        else:
+            if image_bytes:
+                break
+            error, retry = "Failed to generate image", True
+
+        delay = next(delays, None) if retry else None
+        if delay is None:
+            return {"status": "error", "attempts": attempts, "error": error}
+        await asyncio.sleep(delay)
+
+    if key is not None:
+        await asyncio.to_thread(image_cache.put, key, image_bytes)
+    return {
+        "status": "ok",
+        "attempts": attempts,
+        "mime_type": mime_type or sniff_image_type(image_bytes),
+        "image_base64": base64.b64encode(image_bytes).decode("utf-8"),
+    }
+
+
+async def run_batch(api_key: str, items: List[BatchItem], parallelism: int, retries: int):
+    """Yield one NDJSON line per item in completion order, then a summary line."""
+    semaphore = asyncio.Semaphore(parallelism)
+
+    async def run(item: BatchItem) -> dict:
+        async with semaphore:
+            result = await _generate_item(api_key, item, retries)
+        return {"index": item.index, "id": item.id, **result}
+
+    tasks = [asyncio.create_task(run(item)) for item in items]
+    failed = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            if result["status"] != "ok":
+                failed += 1
+            yield json.dumps(result) + "\n"
+        yield json.dumps({"type": "done", "total": len(items), "failed": failed}) + "\n"
+    finally:
+        # The client went away mid-stream: stop paying for the remaining items.
+        for task in tasks:
+            task.cancel()
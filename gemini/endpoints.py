@@ -1,170 +1,184 @@
 import asyncio
 import json
-import os
+import logging
 import base64
-from dotenv import load_dotenv
-from fastapi import WebSocket, WebSocketDisconnect , APIRouter , File, UploadFile, Form, HTTPException , Header
-from google import genai
-from google.genai import types
-from fastapi.responses import JSONResponse
-import io
-from pydantic import BaseModel
-from typing import List, Optional
-
-load_dotenv() 
+from fastapi import WebSocket, APIRouter , File, UploadFile, Form, HTTPException , Header
+from fastapi.responses import StreamingResponse
+from fastapi import Response, Request, Query
+from typing import Optional
+from gemini.image import generate_image_bytes, stream_image_parts, sniff_image_type, IMAGE_MODEL, GENERATE_CONTENT_CONFIG_KEY
+from gemini.image_cache import image_cache, cache_key
+from gemini.batch import parse_batch, run_batch, BATCH_PARALLELISM, BATCH_MAX_PARALLELISM, BATCH_RETRIES
+from core import config  # noqa: F401  (loads .env)
+from core.relay import Relay
+from gemini.live import GeminiLiveAdapter, warm_live_sessions
 
 router = APIRouter()
 
-MODEL = "gemini-2.0-flash-exp"
+logger = logging.getLogger(__name__)
+
 
-client = genai.Client(
-    api_key=  os.getenv('GEMINI_API_KEY'),
-    http_options={
-        'api_version': 'v1alpha',
+async def startup():
+    # Index the on-disk image cache once, off the event loop, before the first request.
+    if image_cache.enabled:
+        await asyncio.to_thread(image_cache.load)
+    warm_live_sessions()
 
-    }
-)
 
 @router.websocket("/ws")
 async def gemini_websocket_endpoint(websocket: WebSocket):
-    await websocket.accept()
-    try:
-        config_message = await websocket.receive_text()
-        config_data = json.loads(config_message)
-        config = config_data.get("setup", {})
-
-        async with client.aio.live.connect(model=MODEL, config=config) as session:
-            print("Connected to Gemini API")
-            
-            async def send_to_gemini():
-                try:
-                    while True:
-                        message = await websocket.receive_text()
-                        data = json.loads(message)
-                        if "realtime_input" in data:
-                            for chunk in data["realtime_input"]["media_chunks"]:
-                                if chunk["mime_type"] == "audio/pcm":
-                                    await session.send({"mime_type": "audio/pcm", "data": chunk["data"]})
-                                elif chunk["mime_type"] == "image/jpeg":
-                                    await session.send({"mime_type": "image/jpeg", "data": chunk["data"]})
-                except WebSocketDisconnect:
-                    print("Client disconnected during send")
-                except Exception as e:
-                    print(f"Error sending to Gemini: {e}")
-                finally:
-                    print("send_to_gemini closed")
-
-            async def receive_from_gemini():
-                try:
-                    while True:
-                        async for response in session.receive():
-                            print(f"response: {response}")
-                            if response.server_content is None:
-                                print(f"Unhandled server message! - {response}")
-                                continue
-
-                            model_turn = response.server_content.model_turn
-                            if model_turn:
-                                for part in model_turn.parts:
-                                    if hasattr(part, 'text') and part.text is not None:
-                                        await websocket.send_text(json.dumps({"text": part.text}))
-                                    elif hasattr(part, 'inline_data') and part.inline_data is not None:
-                                        print("audio mime_type:", part.inline_data.mime_type)
-                                        base64_audio = base64.b64encode(part.inline_data.data).decode('utf-8')
-                                        await websocket.send_text(json.dumps({"audio": base64_audio}))
-                                        print("audio received")
-
-                            if response.server_content.turn_complete:
-                                print("<Turn complete>")
-                except WebSocketDisconnect:
-                    print("Client disconnected during receive")
-                except Exception as e:
-                    print(f"Error receiving from Gemini: {e}")
-                finally:
-                    print("receive_from_gemini closed")
-            send_task = asyncio.create_task(send_to_gemini())
-            receive_task = asyncio.create_task(receive_from_gemini())
-            await asyncio.gather(send_task, receive_task)
+    await Relay(websocket, GeminiLiveAdapter()).serve()
 
-    except Exception as e:
-        print(f"Error in Gemini session: {e}")
-    finally:
-        await websocket.close()
-        print("Gemini session closed.")
 
+IMAGE_STREAM_CHUNK_SIZE = 64 * 1024
 
 
+def negotiate_image_format(accept: str) -> str:
+    """Pick "json" (default), "image" (raw bytes) or "ndjson" (streamed parts) from Accept."""
+    ranges = []
+    for position, item in enumerate(accept.split(",")):
+        media_type, _, params = item.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        ranges.append((-quality, position, media_type.strip().lower()))
+    for _, _, media_type in sorted(ranges):
+        if media_type == "application/x-ndjson":
+            return "ndjson"
+        if media_type.startswith("image/"):
+            return "image"
+        if media_type in ("application/json", "*/*"):
+            return "json"
+    return "json"
+
+
+async def iter_image_bytes(data, close=None):
+    # Slices are copied chunk by chunk, so an mmap-backed image can be closed safely.
+    try:
+        for start in range(0, len(data), IMAGE_STREAM_CHUNK_SIZE):
+            yield data[start:start + IMAGE_STREAM_CHUNK_SIZE]
+    finally:
+        if close is not None:
+            close()
 
 
+async def stream_image_ndjson(x_api_key: str, input_image_bytes: bytes, mime_type: str, prompt: str, key: Optional[str]):
+    try:
+        async for part in stream_image_parts(x_api_key, input_image_bytes, mime_type, prompt):
+            if part.text is not None:
+                yield json.dumps({"type": "text", "text": part.text}) + "\n"
+            elif part.inline_data is not None:
+                if key is not None:
+                    await asyncio.to_thread(image_cache.put, key, part.inline_data.data)
+                image_base64 = base64.b64encode(part.inline_data.data).decode('utf-8')
+                yield json.dumps({"type": "image", "mime_type": part.inline_data.mime_type, "image_base64": image_base64}) + "\n"
+                break
+        yield json.dumps({"type": "done"}) + "\n"
+    except asyncio.TimeoutError:
+        yield json.dumps({"type": "error", "message": "Image generation timed out"}) + "\n"
+    except Exception as e:
+        yield json.dumps({"type": "error", "message": f"Image generation failed: {str(e)}"}) + "\n"
 
 
 @router.post("/generate-image/")
-async def generate_image(file: UploadFile = File(...), prompt: str = Form(...) ,  x_api_key: str = Header(...)):
+async def generate_image(
+    response: Response,
+    file: UploadFile = File(...),
+    prompt: str = Form(...) ,
+    x_api_key: str = Header(...),
+    x_cache_bypass: bool = Header(False),
+    accept: str = Header("application/json"),
+):
 
     try:
-        client = genai.Client(api_key=x_api_key)
-
+        response_format = negotiate_image_format(accept)
         input_image_bytes = await file.read()
-        
-        with open("temp_input.jpeg", "wb") as f:
-            f.write(input_image_bytes)
-
-        uploaded_file = client.files.upload(file="temp_input.jpeg")
-
-        contents = [
-            types.Content(
-                role="user",
-                parts=[
-                    types.Part.from_uri(
-                        file_uri=uploaded_file.uri,
-                        mime_type=uploaded_file.mime_type,
-                    ),
-                    types.Part.from_text(text=prompt),
-                ],
+        mime_type = file.content_type or "image/jpeg"
+
+        key = None
+        cache_headers = {}
+        if image_cache.enabled:
+            key = cache_key(input_image_bytes, prompt, IMAGE_MODEL, GENERATE_CONTENT_CONFIG_KEY)
+            cached = None if x_cache_bypass else await asyncio.to_thread(image_cache.get, key)
+            if cached is not None:
+                cache_headers["X-Cache"] = "HIT"
+                if response_format == "image":
+                    return StreamingResponse(
+                        iter_image_bytes(cached, cached.close),
+                        media_type=sniff_image_type(cached),
+                        headers=cache_headers,
+                    )
+                with cached:
+                    image_base64 = base64.b64encode(cached).decode('utf-8')
+                    cached_mime_type = sniff_image_type(cached)
+                if response_format == "ndjson":
+                    line = json.dumps({"type": "image", "mime_type": cached_mime_type, "image_base64": image_base64})
+                    return StreamingResponse(
+                        iter([line + "\n", json.dumps({"type": "done"}) + "\n"]),
+                        media_type="application/x-ndjson",
+                        headers=cache_headers,
+                    )
+                response.headers.update(cache_headers)
+                return {
+                    'image_base64': image_base64
+                }
+            cache_headers["X-Cache"] = "BYPASS" if x_cache_bypass else "MISS"
+
+        if response_format == "ndjson":
+            # Parts are forwarded as they arrive; errors become a final "error" line.
+            return StreamingResponse(
+                stream_image_ndjson(x_api_key, input_image_bytes, mime_type, prompt, key),
+                media_type="application/x-ndjson",
+                headers=cache_headers,
             )
-        ]
-
-        generate_content_config = types.GenerateContentConfig(
-            temperature=1,
-            top_p=0.95,
-            top_k=40,
-            max_output_tokens=8192,
-            response_modalities=["image", "text"],
-            safety_settings=[
-                types.SafetySetting(
-                    category="HARM_CATEGORY_CIVIC_INTEGRITY",
-                    threshold="OFF",
-                ),
-            ],
-            response_mime_type="text/plain",
-        )
-
-        generated_image_bytes = None
-
-        for chunk in client.models.generate_content_stream(
-            model="gemini-2.0-flash-exp-image-generation",
-            contents=contents,
-            config=generate_content_config,
-        ):
-            if not chunk.candidates or not chunk.candidates[0].content or not chunk.candidates[0].content.parts:
-                continue
-            
-            if chunk.candidates[0].content.parts[0].inline_data:
-                generated_image_bytes = chunk.candidates[0].content.parts[0].inline_data.data
-                break
 
-        os.remove("temp_input.jpeg")
+        generated_image_bytes, generated_mime_type = await generate_image_bytes(x_api_key, input_image_bytes, mime_type, prompt)
 
         if not generated_image_bytes:
             raise HTTPException(status_code=500, detail="Failed to generate image")
 
+        if key is not None:
+            await asyncio.to_thread(image_cache.put, key, generated_image_bytes)
+
+        if response_format == "image":
+            return StreamingResponse(
+                iter_image_bytes(generated_image_bytes),
+                media_type=generated_mime_type or sniff_image_type(generated_image_bytes),
+                headers=cache_headers,
+            )
+
         image_base64 = base64.b64encode(generated_image_bytes).decode('utf-8')
 
+        response.headers.update(cache_headers)
         return {
             'image_base64': image_base64
         }
 
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=504, detail="Image generation timed out")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Image generation failed: {str(e)}")
 
 
+@router.post("/generate-image/batch")
+async def generate_image_batch(
+    request: Request,
+    x_api_key: str = Header(...),
+    parallelism: int = Query(BATCH_PARALLELISM, ge=1, le=BATCH_MAX_PARALLELISM),
+    retries: int = Query(BATCH_RETRIES, ge=0, le=5),
+):
+    items = await parse_batch(request)
+    return StreamingResponse(
+        run_batch(x_api_key, items, parallelism, retries),
+        media_type="application/x-ndjson",
+    )
+
+
+@router.get("/image-cache-stats")
+async def get_image_cache_stats():
+    return image_cache.stats()
@@ -0,0 +1,136 @@
+import asyncio
+import os
+from collections import OrderedDict
+
+from google import genai
+from google.genai import types
+
+from core import config  # noqa: F401  (loads .env)
+
+IMAGE_MODEL = "gemini-2.0-flash-exp-image-generation"
+IMAGE_MAX_CONCURRENCY = int(os.getenv("GEMINI_IMAGE_MAX_CONCURRENCY", "8"))
+IMAGE_TIMEOUT = float(os.getenv("GEMINI_IMAGE_TIMEOUT", "120"))
+IMAGE_CLIENT_CACHE_SIZE = int(os.getenv("GEMINI_IMAGE_CLIENT_CACHE_SIZE", "64"))
+
+GENERATE_CONTENT_CONFIG = types.GenerateContentConfig(
+    temperature=1,
+    top_p=0.95,
+    top_k=40,
+    max_output_tokens=8192,
+    response_modalities=["image", "text"],
+    safety_settings=[
+        types.SafetySetting(
+            category="HARM_CATEGORY_CIVIC_INTEGRITY",
+            threshold="OFF",
+        ),
+    ],
+    response_mime_type="text/plain",
+)
+
+# Identifies the generation settings in content-addressed cache keys.
+GENERATE_CONTENT_CONFIG_KEY = GENERATE_CONTENT_CONFIG.model_dump_json(exclude_none=True)
+
+_semaphore = asyncio.Semaphore(IMAGE_MAX_CONCURRENCY)
+_clients: "OrderedDict[str, genai.Client]" = OrderedDict()
+
+
+def get_client(api_key: str) -> genai.Client:
+    """Reuse one client (and its connection pool) per API key."""
+    client = _clients.get(api_key)
+    if client is None:
+        client = _clients[api_key] = genai.Client(api_key=api_key)
+        while len(_clients) > IMAGE_CLIENT_CACHE_SIZE:
+            _clients.popitem(last=False)
+    else:
+        _clients.move_to_end(api_key)
+    return client
+
+
+def build_contents(image_bytes: bytes, mime_type: str, prompt: str):
+    # The image travels inline with the request instead of via the Files API.
+    return [
+        types.Content(
+            role="user",
+            parts=[
+                types.Part.from_bytes(data=image_bytes, mime_type=mime_type),
+                types.Part.from_text(text=prompt),
+            ],
+        )
+    ]
+
+
+async def _stream_parts(client: genai.Client, image_bytes: bytes, mime_type: str, prompt: str):
+    stream = await client.aio.models.generate_content_stream(
+        model=IMAGE_MODEL,
+        contents=build_contents(image_bytes, mime_type, prompt),
+        config=GENERATE_CONTENT_CONFIG,
+    )
+    async for chunk in stream:
+        if not chunk.candidates or not chunk.candidates[0].content or not chunk.candidates[0].content.parts:
+            continue
+
+        for part in chunk.candidates[0].content.parts:
+            yield part
+
+
+async def _generate(client: genai.Client, image_bytes: bytes, mime_type: str, prompt: str):
+    async for part in _stream_parts(client, image_bytes, mime_type, prompt):
+        if part.inline_data:
+            return part.inline_data.data, part.inline_data.mime_type
+    return None, None
+
+
+async def _generate_bounded(api_key: str, image_bytes: bytes, mime_type: str, prompt: str):
+    async with _semaphore:
+        return await _generate(get_client(api_key), image_bytes, mime_type, prompt)
+
+
+async def generate_image_bytes(api_key: str, image_bytes: bytes, mime_type: str, prompt: str):
+    """Run one image edit on the async client, bounded by the process-wide semaphore.
+
+    Returns `(image_bytes, mime_type)`, both None when the model produced no image.
+    Raises `asyncio.TimeoutError` when waiting for a slot plus the generation
+    itself exceeds `IMAGE_TIMEOUT`.
+    """
+    return await asyncio.wait_for(
+        _generate_bounded(api_key, image_bytes, mime_type, prompt),
+        IMAGE_TIMEOUT,
+    )
+
+
+async def stream_image_parts(api_key: str, image_bytes: bytes, mime_type: str, prompt: str):
+    """Yield response parts (text and inline image) as the model produces them.
+
+    Holds a concurrency slot for the whole stream and enforces the same overall
+    `IMAGE_TIMEOUT` deadline as `generate_image_bytes`.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + IMAGE_TIMEOUT
+    await asyncio.wait_for(_semaphore.acquire(), IMAGE_TIMEOUT)
+    try:
+        parts = _stream_parts(get_client(api_key), image_bytes, mime_type, prompt)
+        try:
+            while True:
+                try:
+                    part = await asyncio.wait_for(parts.__anext__(), deadline - loop.time())
+                except StopAsyncIteration:
+                    return
+                yield part
+        finally:
+            await parts.aclose()
+    finally:
+        _semaphore.release()
+
+
+def sniff_image_type(data) -> str:
+    """Best-effort MIME type for stored image bytes, which carry no metadata."""
+    head = bytes(data[:12])
+    if head.startswith(b"\x89PNG"):
+        return "image/png"
+    if head.startswith(b"\xff\xd8"):
+        return "image/jpeg"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head[:4] == b"GIF8":
+        return "image/gif"
+    return "application/octet-stream"
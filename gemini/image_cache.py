@@ -0,0 +1,133 @@
+import hashlib
+import mmap
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from core import config  # noqa: F401  (loads .env)
+
+IMAGE_CACHE_ENABLED = os.getenv("GEMINI_IMAGE_CACHE_ENABLED", "false").lower() == "true"
+IMAGE_CACHE_DIR = os.getenv("GEMINI_IMAGE_CACHE_DIR", os.path.join(tempfile.gettempdir(), "gemini-image-cache"))
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("GEMINI_IMAGE_CACHE_MAX_BYTES", str(1024 * 1024 * 1024)))
+
+
+def cache_key(image_bytes: bytes, prompt: str, model: str, config: str) -> str:
+    """Content address of one generation: same inputs, same output slot."""
+    digest = hashlib.sha256()
+    for part in (model.encode("utf-8"), config.encode("utf-8"), prompt.encode("utf-8"), image_bytes):
+        # Length-prefix each field so different splits can never collide.
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class ImageCache:
+    """Size-bounded, content-addressed on-disk store of generated images.
+
+    Entries are immutable files named by their key; hits are served through a
+    read-only `mmap` so the bytes come straight from the page cache. The LRU
+    order lives in memory and is rebuilt from file mtimes (touched on every hit)
+    when the process starts.
+    """
+
+    def __init__(self, directory: str = IMAGE_CACHE_DIR, max_bytes: int = IMAGE_CACHE_MAX_BYTES, enabled: bool = IMAGE_CACHE_ENABLED):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.index: "OrderedDict[str, int]" = OrderedDict()
+        self.total_bytes = 0
+        self.loaded = False
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key)
+
+    def load(self):
+        """Build the LRU index from the cache directory; blocking, run it at startup off the event loop."""
+        with self.lock:
+            if not self.loaded:
+                self._load()
+
+    def _load(self):
+        entries = []
+        os.makedirs(self.directory, exist_ok=True)
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".tmp"):
+                    continue
+                stat = os.stat(os.path.join(root, name))
+                entries.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(entries):
+            self.index[name] = size
+            self.total_bytes += size
+        self.loaded = True
+
+    def get(self, key: str) -> Optional[mmap.mmap]:
+        """Return a read-only map of the cached image, or None. The caller closes it.
+
+        Blocking file I/O (open, mmap, utime), so call it from a worker thread.
+        """
+        with self.lock:
+            if not self.loaded:
+                self._load()
+            if key not in self.index:
+                self.misses += 1
+                return None
+            self.index.move_to_end(key)
+
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            os.utime(path)
+        except (OSError, ValueError):
+            with self.lock:
+                self.total_bytes -= self.index.pop(key, 0)
+                self.misses += 1
+            return None
+        self.hits += 1
+        return view
+
+    def put(self, key: str, data: bytes):
+        """Store an image; blocking file I/O, so call it from a worker thread."""
+        if not data:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self.lock:
+            if not self.loaded:
+                self._load()
+            self.total_bytes += len(data) - self.index.pop(key, 0)
+            self.index[key] = len(data)
+            while self.total_bytes > self.max_bytes and len(self.index) > 1:
+                old_key, size = self.index.popitem(last=False)
+                self.total_bytes -= size
+                self.evictions += 1
+                try:
+                    os.remove(self._path(old_key))
+                except OSError:
+                    pass
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "entries": len(self.index),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+image_cache = ImageCache()
@@ -0,0 +1,250 @@
+import base64
+import functools
+import json
+import logging
+import os
+from contextlib import suppress
+from typing import List, Optional, Tuple
+
+from fastapi import WebSocket
+from google import genai
+from google.genai import errors
+
+from core import config  # noqa: F401  (loads .env)
+from core.log import SampledLogger, LOG_SAMPLE_RATE
+from core.relay import NORMAL_CLOSURE, RelayAdapter
+from core.resilience import RecentTurns
+from core.session_pool import session_pool, websocket_healthy, websocket_open
+from core.audio_frames import BINARY_SUBPROTOCOL, AUDIO_FRAME
+
+logger = logging.getLogger(__name__)
+# Per-frame events are logged at most once every LIVE_LOG_SAMPLE_RATE frames.
+LIVE_LOG_SAMPLE_RATE = int(os.getenv("GEMINI_LIVE_LOG_SAMPLE_RATE", str(LOG_SAMPLE_RATE)))
+send_log = SampledLogger(logger, LIVE_LOG_SAMPLE_RATE)
+receive_log = SampledLogger(logger, LIVE_LOG_SAMPLE_RATE)
+unhandled_log = SampledLogger(logger, LIVE_LOG_SAMPLE_RATE, logging.INFO)
+
+MODEL = "gemini-2.0-flash-exp"
+
+# JSON list of client `setup` objects whose sessions are pre-warmed at startup
+# when the session pool is enabled; any other setup connects directly.
+GEMINI_POOLED_SETUPS: List[dict] = json.loads(os.getenv("GEMINI_POOLED_SETUPS", "[]"))
+
+_live_client: Optional[genai.Client] = None
+
+
+def get_live_client() -> genai.Client:
+    """The v1alpha client used for live sessions, built on first use."""
+    global _live_client
+    if _live_client is None:
+        _live_client = genai.Client(
+            api_key=os.getenv('GEMINI_API_KEY'),
+            http_options={
+                'api_version': 'v1alpha',
+            }
+        )
+    return _live_client
+
+
+async def open_live_session(config: dict):
+    connection = get_live_client().aio.live.connect(model=MODEL, config=config)
+    session = await connection.__aenter__()
+
+    async def close():
+        await connection.__aexit__(None, None, None)
+
+    return session, close
+
+
+def live_pool_key(setup: dict) -> tuple:
+    return ("gemini", MODEL, json.dumps(setup, sort_keys=True))
+
+
+def warm_live_sessions():
+    for setup in GEMINI_POOLED_SETUPS:
+        session_pool.warm(
+            live_pool_key(setup),
+            functools.partial(open_live_session, setup),
+            health=live_session_healthy,
+            alive=live_session_open,
+        )
+
+
+def live_session_open(session) -> bool:
+    # The SDK does not expose connection state publicly; fall back to "open".
+    ws = getattr(session, "_ws", None)
+    return ws is None or websocket_open(ws)
+
+
+async def live_session_healthy(session) -> bool:
+    ws = getattr(session, "_ws", None)
+    return ws is None or await websocket_healthy(ws)
+
+
+# Client media types and the `send_realtime_input` argument each one goes in.
+REALTIME_INPUT_KINDS = {"audio/pcm": "audio", "image/jpeg": "video"}
+
+
+def build_media_chunks(data: dict) -> List[Tuple[str, dict]]:
+    """Realtime inputs of one client message as (`send_realtime_input` argument, blob) pairs.
+
+    The SDK takes one blob per call, so consecutive PCM chunks are joined into a
+    single audio blob; a message of several mic frames is still one upstream frame.
+    """
+    inputs: List[Tuple[str, dict]] = []
+    pcm: List[bytes] = []
+    for chunk in data["realtime_input"]["media_chunks"]:
+        kind = REALTIME_INPUT_KINDS.get(chunk["mime_type"])
+        if kind == "audio":
+            pcm.append(base64.b64decode(chunk["data"]))
+        elif kind is not None:
+            if pcm:
+                inputs.append(("audio", {"mime_type": "audio/pcm", "data": b"".join(pcm)}))
+                pcm = []
+            inputs.append((kind, {"mime_type": chunk["mime_type"], "data": base64.b64decode(chunk["data"])}))
+    if pcm:
+        inputs.append(("audio", {"mime_type": "audio/pcm", "data": b"".join(pcm)}))
+    return inputs
+
+
+async def relay_server_message(websocket: WebSocket, response, binary: bool) -> int:
+    """Forward one Gemini server message to the browser; returns audio bytes relayed."""
+    if response.server_content is None:
+        unhandled_log.log("Unhandled Gemini server message")
+        return 0
+
+    audio_bytes = 0
+    model_turn = response.server_content.model_turn
+    if model_turn:
+        for part in model_turn.parts:
+            if part.text is not None:
+                await websocket.send_text(json.dumps({"text": part.text}))
+            elif part.inline_data is not None:
+                data = part.inline_data.data
+                audio_bytes += len(data)
+                if binary:
+                    await websocket.send_bytes(bytes((AUDIO_FRAME,)) + data)
+                else:
+                    await websocket.send_text('{"audio":"' + base64.b64encode(data).decode("ascii") + '"}')
+
+    if response.server_content.turn_complete:
+        logger.debug("Gemini turn complete")
+    return audio_bytes
+
+
+class GeminiLiveAdapter(RelayAdapter):
+    """Browser <-> Gemini Live. The first client message carries the session `setup`.
+
+    Clients offering the binary subprotocol send and receive raw PCM frames;
+    others use the JSON `realtime_input` / `{"audio": base64}` messages. Either
+    kind may send typed turns as `client_content` messages.
+    """
+
+    provider = "gemini"
+
+    def __init__(self):
+        self.binary = False
+        self.config: dict = {}
+        self.session = None
+        self.close_session = None
+        # Text of the turn in progress and of recent completed turns, for replay after a reconnect.
+        self.user_text: List[str] = []
+        self.model_text: List[str] = []
+        self.turns = RecentTurns()
+
+    @property
+    def endpoint(self) -> str:
+        return f"gemini:{MODEL}"
+
+    async def accept(self) -> bool:
+        self.binary = BINARY_SUBPROTOCOL in self.websocket.scope.get("subprotocols", [])
+        await self.websocket.accept(subprotocol=BINARY_SUBPROTOCOL if self.binary else None)
+        config_message = await self.websocket.receive_text()
+        self.config = json.loads(config_message).get("setup", {})
+        return True
+
+    async def connect(self):
+        self.session, self.close_session = await session_pool.acquire(
+            live_pool_key(self.config),
+            functools.partial(open_live_session, self.config),
+            health=live_session_healthy,
+            alive=live_session_open,
+        )
+        logger.info("Connected to Gemini API (binary=%s)", self.binary)
+
+    async def reconnect(self):
+        # `connect` re-sends the client's setup; recent turns go back in as context
+        # without completing a turn, so the model does not answer them again.
+        if self.close_session is not None:
+            with suppress(Exception):
+                await self.close_session()
+        self.session = self.close_session = None
+        self.user_text.clear()
+        self.model_text.clear()
+        await self.connect()
+        if self.turns:
+            await self.session.send_client_content(
+                turns=[{"role": role, "parts": [{"text": text}]} for role, text in self.turns.items()],
+                turn_complete=False,
+            )
+
+    async def from_client(self, message: dict) -> bool:
+        frame = message.get("bytes")
+        if frame is not None:
+            if frame and frame[0] == AUDIO_FRAME:
+                await self.session.send_realtime_input(audio={"mime_type": "audio/pcm", "data": frame[1:]})
+                send_log.log("Relayed %d audio bytes to Gemini", len(frame) - 1)
+            return True
+
+        data = json.loads(message["text"])
+        if "realtime_input" in data:
+            media_chunks = build_media_chunks(data)
+            for kind, blob in media_chunks:
+                await self.session.send_realtime_input(**{kind: blob})
+            if media_chunks:
+                send_log.log("Relayed %d media inputs to Gemini", len(media_chunks))
+        elif "client_content" in data:
+            # Typed turns take the ordered, turn-based path rather than realtime input.
+            content = data["client_content"]
+            turns = content.get("turns") or []
+            await self.session.send_client_content(turns=turns, turn_complete=content.get("turn_complete", True))
+            for turn in turns:
+                if turn.get("role", "user") == "user":
+                    self.user_text.extend(part["text"] for part in turn.get("parts", []) if part.get("text"))
+        return True
+
+    async def to_client(self):
+        try:
+            while True:
+                # session.receive() ends after each turn_complete; keep listening for the next turn.
+                async for response in self.session.receive():
+                    audio_bytes = await relay_server_message(self.websocket, response, self.binary)
+                    self.stats.to_client(audio_bytes, audio=audio_bytes > 0)
+                    if response.server_content is not None:
+                        self.remember(response.server_content)
+                    if audio_bytes:
+                        receive_log.log("Relayed %d audio bytes to client", audio_bytes)
+        except errors.APIError as e:
+            # The SDK reports every upstream close as APIError(close code);
+            # a normal closure just ends the session.
+            if e.code != NORMAL_CLOSURE:
+                raise
+            logger.info("Gemini closed the session")
+
+    def remember(self, content):
+        # Transcriptions are only present when enabled in the client's setup.
+        if content.input_transcription is not None and content.input_transcription.text:
+            self.user_text.append(content.input_transcription.text)
+        if content.output_transcription is not None and content.output_transcription.text:
+            self.model_text.append(content.output_transcription.text)
+        elif content.model_turn:
+            self.model_text.extend(part.text for part in content.model_turn.parts if part.text)
+        if content.turn_complete:
+            self.turns.add("user", "".join(self.user_text))
+            self.turns.add("model", "".join(self.model_text))
+            self.user_text.clear()
+            self.model_text.clear()
+
+    async def close(self):
+        if self.close_session is not None:
+            await self.close_session()
@@ -1,13 +1,79 @@
+import importlib
+from contextlib import asynccontextmanager
+from core.log import setup_logging
+
+# Configure logging before the routers are imported so their import-time logs go through it too.
+setup_logging()
+
 from fastapi import FastAPI
-from gemini.endpoints import router as gemini_router
-from open_ai.endpoints import router as chatgpt_router
-from elevenlab.endpoints import router as elevenlabs_router
-from dotenv import load_dotenv
+from fastapi.responses import PlainTextResponse
+from core.config import ENABLED_ROUTERS, ROUTER_NAMES
+from core.session_pool import session_pool
+from core.admission import admission
+from core.metrics import registry, MetricsMiddleware, ACTIVE_SESSIONS, UPSTREAM_CIRCUIT_OPEN
+from core.resilience import breakers
+
+# name -> (module defining `router`, mount prefix). Modules may also define async
+# `startup()`/`shutdown()` hooks, which run in the app lifespan.
+ROUTERS = {
+    "gemini": ("gemini.endpoints", "/gemini"),
+    "chatgpt": ("open_ai.endpoints", "/chatgpt"),
+    "elevenlabs": ("elevenlab.endpoints", "/elevenlabs"),
+}
+
+unknown = set(ENABLED_ROUTERS) - set(ROUTER_NAMES)
+if unknown:
+    raise RuntimeError(f"Unknown ENABLED_ROUTERS entries: {', '.join(sorted(unknown))}")
+
+# Only the enabled providers' modules (and their SDKs) are imported.
+modules = {name: importlib.import_module(ROUTERS[name][0]) for name in ENABLED_ROUTERS}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    started = []
+    await session_pool.start()
+    try:
+        for module in modules.values():
+            startup = getattr(module, "startup", None)
+            if startup is not None:
+                await startup()
+            started.append(module)
+        yield
+    finally:
+        for module in reversed(started):
+            shutdown = getattr(module, "shutdown", None)
+            if shutdown is not None:
+                await shutdown()
+        await session_pool.stop()
+
+
+app = FastAPI(lifespan=lifespan)
+# Filled in as the routers are included below, so route labels carry their mount prefix.
+route_prefixes = {}
+app.add_middleware(MetricsMiddleware, route_prefixes=route_prefixes)
+
+# Read from the admission counters at scrape time; nothing extra on the hot path.
+ACTIVE_SESSIONS.set_function(lambda: {(provider,): live for provider, live in admission.live.items()})
+UPSTREAM_CIRCUIT_OPEN.set_function(breakers.open_endpoints)
+
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/admission-stats")
+def get_admission_stats():
+    return admission.stats()
+
 
-load_dotenv()
+@app.get("/upstream-stats")
+def get_upstream_stats():
+    return breakers.stats()
 
-app = FastAPI()
 
-app.include_router(gemini_router, prefix="/gemini")
-app.include_router(chatgpt_router, prefix="/chatgpt")
-app.include_router(elevenlabs_router, prefix="/elevenlabs")
+for name, module in modules.items():
+    prefix = ROUTERS[name][1]
+    app.include_router(module.router, prefix=prefix)
+    route_prefixes.update((id(route), prefix) for route in module.router.routes)
@@ -0,0 +1,58 @@
+import base64
+import re
+from typing import Optional, Union
+
+from core.audio_frames import AUDIO_FRAME
+
+_AUDIO_DELTA_TYPE = '"type":"response.audio.delta"'
+_DELTA_KEY = '"delta":"'
+# Strict standard base64: the only client text ever spliced into an upstream event.
+_BASE64 = re.compile(r"(?:[A-Za-z0-9+/]{4})*(?:[A-Za-z0-9+/]{2}==|[A-Za-z0-9+/]{3}=)?")
+
+
+def encode_append(pcm: Union[bytes, memoryview]) -> str:
+    """Build an `input_audio_buffer.append` event without an intermediate dict.
+
+    Base64 output never contains characters that need JSON escaping.
+    """
+    audio = base64.b64encode(pcm).decode("ascii")
+    return '{"type":"input_audio_buffer.append","audio":"' + audio + '"}'
+
+
+def encode_append_base64(audio: str) -> str:
+    """Build an `input_audio_buffer.append` event from client-supplied base64.
+
+    `audio` comes from the browser, so it is checked to be strict base64 before
+    being spliced in; anything else (quotes, backslashes, ...) raises ValueError
+    rather than letting a client inject its own event fields.
+    """
+    if _BASE64.fullmatch(audio) is None:
+        raise ValueError("audio is not valid base64")
+    return '{"type":"input_audio_buffer.append","audio":"' + audio + '"}'
+
+
+def extract_audio_delta(message: str) -> Optional[str]:
+    """Return the base64 payload of a `response.audio.delta` message, or None.
+
+    Audio deltas are the bulk of upstream traffic, so they are sliced out of the
+    raw text instead of going through `json.loads`. Anything that does not look
+    exactly like a compact audio delta falls back to the regular JSON path.
+    """
+    if _AUDIO_DELTA_TYPE not in message:
+        return None
+    start = message.find(_DELTA_KEY)
+    if start < 0:
+        return None
+    start += len(_DELTA_KEY)
+    end = message.find('"', start)
+    if end < 0:
+        return None
+    return message[start:end]
+
+
+def audio_json(delta: str) -> str:
+    return '{"type":"audio","data":"' + delta + '"}'
+
+
+def audio_frame(delta: str) -> bytes:
+    return bytes((AUDIO_FRAME,)) + base64.b64decode(delta)
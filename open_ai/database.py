@@ -1,12 +1,13 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from dotenv import load_dotenv
+from sqlalchemy.orm import Session, sessionmaker
+from typing import Optional
+from uuid import uuid4
 import os
-import supabase
 
-
-load_dotenv()
+from core import config  # noqa: F401  (loads .env)
 
 USER = os.getenv("user")
 PASSWORD = os.getenv("password")
@@ -14,13 +15,93 @@ HOST = os.getenv("host")
 PORT = os.getenv("port")
 DBNAME = os.getenv("dbname")
 DATABASE_URL = f"postgresql://{USER}:{PASSWORD}@{HOST}:{PORT}/{DBNAME}"
-Engine = create_engine(DATABASE_URL)
-
 
+ASYNC_DATABASE_URL = f"postgresql+asyncpg://{USER}:{PASSWORD}@{HOST}:{PORT}/{DBNAME}"
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+# Size of both asyncpg's statement cache and SQLAlchemy's prepared-statement cache
+# on top of it. Set to 0 when connecting through a transaction-mode pooler (e.g.
+# Supabase's pgbouncer); statements then also get unique names, since a name
+# prepared on one server connection does not exist on the next.
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
 
 SUPABASE_KEY = os.getenv("APIKEY_SECRET")
 SUPABASE_URL = os.getenv("SUPABASE_URL")
-Client = supabase.create_client(SUPABASE_URL, SUPABASE_KEY)
-Sensionalocal = sessionmaker(bind=Engine, autoflush=False, autocommit=False)
 
 Base = declarative_base()
+
+# Engines, session factories and the Supabase client are built on first use, so
+# importing this module never touches the network or loads a DB driver.
+_engine: Optional[Engine] = None
+_async_engine: Optional[AsyncEngine] = None
+_session_factory: Optional[sessionmaker] = None
+_async_session_factory: Optional[async_sessionmaker] = None
+_supabase_client = None
+
+
+def get_engine() -> Engine:
+    global _engine
+    if _engine is None:
+        _engine = create_engine(DATABASE_URL)
+    return _engine
+
+
+def _unique_statement_name() -> str:
+    return f"__asyncpg_{uuid4()}__"
+
+
+def get_async_engine() -> AsyncEngine:
+    global _async_engine
+    if _async_engine is None:
+        connect_args = {
+            "statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE,
+        }
+        if DB_STATEMENT_CACHE_SIZE == 0:
+            connect_args["prepared_statement_name_func"] = _unique_statement_name
+        _async_engine = create_async_engine(
+            ASYNC_DATABASE_URL,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+            pool_pre_ping=DB_POOL_PRE_PING,
+            connect_args=connect_args,
+        )
+    return _async_engine
+
+
+def get_supabase_client():
+    global _supabase_client
+    if _supabase_client is None:
+        import supabase
+
+        _supabase_client = supabase.create_client(SUPABASE_URL, SUPABASE_KEY)
+    return _supabase_client
+
+
+def Sensionalocal() -> Session:
+    global _session_factory
+    if _session_factory is None:
+        _session_factory = sessionmaker(bind=get_engine(), autoflush=False, autocommit=False)
+    return _session_factory()
+
+
+def AsyncSensionalocal() -> AsyncSession:
+    global _async_session_factory
+    if _async_session_factory is None:
+        _async_session_factory = async_sessionmaker(bind=get_async_engine(), autoflush=False, expire_on_commit=False)
+    return _async_session_factory()
+
+
+async def dispose_engines():
+    """Close pooled connections of whichever engines were actually created."""
+    global _engine, _async_engine, _session_factory, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+    if _engine is not None:
+        _engine.dispose()
+    _engine = _async_engine = _session_factory = _async_session_factory = None
@@ -1,64 +1,236 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
+from fastapi import APIRouter, WebSocket, Depends, HTTPException, Query
 import asyncio
+import base64
+import functools
 import json
 import logging
 import ssl
 import websockets
-from typing import Dict, Optional
-from dotenv import load_dotenv
+from typing import Dict, Optional, Set, Tuple, Union
 from open_ai import models
-from open_ai.database import Base, declarative_base, Sensionalocal, Engine, Client
-from sqlalchemy.orm import Session
+from open_ai.database import AsyncSensionalocal, dispose_engines
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, tuple_
 from datetime import datetime
-from open_ai.schemas import Conversation
+from open_ai.schemas import Conversation, ConversationPage, ConversationSummaryPage, UsageReport
+from core.audio_frames import AUDIO_FRAME, BINARY_SUBPROTOCOL, COMMIT_FRAME
+from open_ai import audio_frames
+from open_ai.send_queue import ClientSendQueue
+from open_ai.registry import SessionRegistry, build_registry
+from open_ai.migrations import migrate
+from core.config import RUN_MIGRATIONS_ON_STARTUP
+from core.session_pool import session_pool, websocket_healthy, websocket_open
+from core.metrics import TOKENS
+from core.relay import Relay, RelayAdapter, connect_websocket
+from core.resilience import RECONNECT_BUFFER_BYTES, RecentTurns, upstream_dropped
+from core.tracing import TurnTracer
+from core.log import SampledLogger, LOG_SAMPLE_RATE
+from open_ai.writer import conversation_writer
+from open_ai.usage import DIMENSIONS, usage_aggregator
 import uuid
 import os
+from contextlib import suppress
+from urllib.parse import urlsplit
 
 router = APIRouter()
 
-Base.metadata.create_all(Engine)
-
-def get_db():
-    db = Sensionalocal()
-    try:
+async def get_db():
+    async with AsyncSensionalocal() as db:
         yield db
-    finally:
-        db.close()
 
-load_dotenv()
-
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
+event_log = SampledLogger(logger, LOG_SAMPLE_RATE)
+
+OPENAI_REALTIME_URL = os.getenv(
+    "OPENAI_REALTIME_URL",
+    "wss://gpt4o-realtime.openai.azure.com/openai/realtime?api-version=2024-10-01-preview&deployment=gpt-4o-realtime-preview",
+)  # "wss://api.openai.com/v1/realtime"
+
+REALTIME_INSTRUCTIONS = "kamu adalah planner perjalanan yang akan membantu user  , jawab dalam 2 kalimat"
+# Voices whose sessions (with the default commit policy) are pre-warmed at startup
+# when the session pool is enabled; every warmed voice holds SESSION_POOL_TARGET_SIZE
+# idle upstream sessions per worker. Other voices connect directly.
+OPENAI_POOLED_VOICES = tuple(
+    voice.strip() for voice in os.getenv("OPENAI_POOLED_VOICES", "alloy").split(",") if voice.strip()
+)
+
+TRANSCRIPTION_GRACE_SECONDS = float(os.getenv("TRANSCRIPTION_GRACE_SECONDS", "2"))
+
+# "chunk": commit and respond after every client chunk (legacy behaviour).
+# "manual": buffer audio until the client sends an explicit end-of-utterance.
+# "server_vad": only stream appends and let the upstream detect turns.
+COMMIT_POLICIES = ("chunk", "manual", "server_vad")
+AUDIO_COMMIT_POLICY = os.getenv("AUDIO_COMMIT_POLICY", "chunk")
+AUDIO_COALESCE_BYTES = int(os.getenv("AUDIO_COALESCE_BYTES", "9600"))
+AUDIO_COALESCE_MS = float(os.getenv("AUDIO_COALESCE_MS", "100"))
+
+# Websocket close codes for duplicate client_id handling.
+DUPLICATE_CLOSE_CODE = 4409
+TAKEN_OVER_CLOSE_CODE = 4410
 
 class ConnectionManager:
-    def __init__(self):
+    def __init__(self, registry: Optional[SessionRegistry] = None):
         self.active_connections: Dict[str, WebSocket] = {}
+        self.send_queues: Dict[str, ClientSendQueue] = {}
+        self.binary_clients: Set[str] = set()
+        # Decides which worker owns a client_id and routes messages to it.
+        self.registry = registry or build_registry()
+        self.registry.bind(self._deliver_local, self._kick_local)
+
+    async def start(self):
+        await self.registry.start()
+
+    async def stop(self):
+        await self.registry.stop()
  
-    async def connect(self, websocket: WebSocket, client_id: str):
-        await websocket.accept()
+    async def connect(self, websocket: WebSocket, client_id: str) -> bool:
+        if not await self.registry.claim(client_id):
+            logger.info("Rejecting duplicate client_id %s", client_id)
+            # Accept first so the client actually sees the close code instead of an HTTP 403.
+            await websocket.accept()
+            await websocket.close(code=DUPLICATE_CLOSE_CODE, reason="client_id already connected")
+            return False
+
+        # Clients offering the binary subprotocol get raw PCM16 frames instead of base64 JSON.
+        binary = BINARY_SUBPROTOCOL in websocket.scope.get("subprotocols", [])
+        if binary:
+            await websocket.accept(subprotocol=BINARY_SUBPROTOCOL)
+            self.binary_clients.add(client_id)
+        else:
+            await websocket.accept()
         self.active_connections[client_id] = websocket
+        # Upstream readers only enqueue; a per-client writer task does the actual sends.
+        self.send_queues[client_id] = ClientSendQueue(websocket, binary=binary)
+        return True
+
+    async def disconnect(self, client_id: str, websocket: Optional[WebSocket] = None):
+        # A session that was taken over must not tear down its replacement.
+        if websocket is not None and self.active_connections.get(client_id) is not websocket:
+            return
+        self._drop_local(client_id)
+        try:
+            await self.registry.release(client_id)
+        except Exception as e:
+            logger.error("Error releasing session %s: %s", client_id, e)
 
-    def disconnect(self, client_id: str):
+    def _drop_local(self, client_id: str):
         self.active_connections.pop(client_id, None)
+        self.binary_clients.discard(client_id)
+        send_queue = self.send_queues.pop(client_id, None)
+        if send_queue is not None:
+            send_queue.close()
+
+    async def _kick_local(self, client_id: str):
+        websocket = self.active_connections.get(client_id)
+        self._drop_local(client_id)
+        if websocket is not None:
+            try:
+                await websocket.close(code=TAKEN_OVER_CLOSE_CODE)
+            except Exception:
+                pass
+
+    async def _deliver_local(self, client_id: str, data: dict):
+        send_queue = self.send_queues.get(client_id)
+        if send_queue is not None:
+            send_queue.put_json(data)
+
+    def is_binary(self, client_id: str) -> bool:
+        return client_id in self.binary_clients
 
     async def send_json_response(self, data: dict, client_id: str):
-        if client_id in self.active_connections:
-            await self.active_connections[client_id].send_json(data)
+        # Replies from this worker's own sessions; once the session is gone
+        # locally (disconnected or taken over) there is nobody left to answer.
+        send_queue = self.send_queues.get(client_id)
+        if send_queue is not None:
+            send_queue.put_json(data)
+
+    async def send_to_client(self, client_id: str, data: dict) -> bool:
+        """Deliver `data` to `client_id` on whichever worker owns it."""
+        return await self.registry.publish(client_id, data)
+
+    async def send_audio(self, delta: str, client_id: str):
+        send_queue = self.send_queues.get(client_id)
+        if send_queue is not None:
+            send_queue.put_audio(delta)
+
+    def stats(self) -> dict:
+        return {client_id: send_queue.stats() for client_id, send_queue in self.send_queues.items()}
 
 manager = ConnectionManager()
 
-class OpenAIRealtimeClient:
+input_tokens = TOKENS.labels("input")
+output_tokens = TOKENS.labels("output")
+
+
+async def startup():
+    if RUN_MIGRATIONS_ON_STARTUP:
+        await asyncio.to_thread(migrate)
+    await conversation_writer.start()
+    await usage_aggregator.start()
+    await manager.start()
+    for voice in OPENAI_POOLED_VOICES:
+        OpenAIRealtimeClient(REALTIME_INSTRUCTIONS, client_id="", voice=voice).warm()
+
+
+async def shutdown():
+    await manager.stop()
+    await usage_aggregator.stop()
+    await conversation_writer.stop()
+    await dispose_engines()
+
+
+async def open_realtime_session(url: str, api_key: str, ssl_context: ssl.SSLContext, session_config: dict):
+    logger.info("Connecting to OpenAI WebSocket: %s", url)
+    headers = {
+        "api-key": api_key,       # f"Bearer {api_key}",
+    }
 
-    def __init__(self, instructions: str, client_id: str, voice: str = "alloy"):
+    ws = await connect_websocket(
+        url,
+        headers=headers,
+        ssl_context=ssl_context
+    )
+    logger.info("Connected to OpenAI Realtime API")
+
+    await ws.send(json.dumps({
+        "type": "session.update",
+        "session": session_config
+    }))
+    return ws, ws.close
+
+class OpenAIRealtimeClient(RelayAdapter):
+
+    provider = "openai"
+
+    def __init__(
+        self,
+        instructions: str,
+        client_id: str,
+        voice: str = "alloy",
+        conversation_id: Optional[str] = None,
+        commit_policy: str = AUDIO_COMMIT_POLICY,
+    ):
         
-        self.url = 'wss://gpt4o-realtime.openai.azure.com/openai/realtime?api-version=2024-10-01-preview&deployment=gpt-4o-realtime-preview'  #"wss://api.openai.com/v1/realtime"
+        self.url = OPENAI_REALTIME_URL
         self.model = "gpt-4o-realtime-preview-2024-10-01"
         self.api_key = os.getenv("OPENAI_API_KEY")
         self.ws: Optional[websockets.WebSocketClientProtocol] = None
         self.instructions = instructions
         self.voice = voice
         self.client_id = client_id
-        self.audio_buffer = b''
+        self.audio_buffer = bytearray()
+        self.audio_flush_task: Optional[asyncio.Task] = None
+        self.commit_policy = commit_policy if commit_policy in COMMIT_POLICIES else "chunk"
+        self.trace: Optional[TurnTracer] = None
+        # Transcripts of recent turns, replayed into a replacement upstream after a drop.
+        self.turns = RecentTurns()
+
+        # When a conversation id is given, turns are persisted server-side instead of
+        # relying on the browser to POST them back to /conversation.
+        self.conversation_id = conversation_id
+        self.input_transcript: Optional[str] = None
+        self.pending_turn: Optional[dict] = None
+        self.pending_turn_task: Optional[asyncio.Task] = None
         
         self.ssl_context = ssl.create_default_context()
         self.ssl_context.check_hostname = False
@@ -76,40 +248,118 @@ class OpenAIRealtimeClient:
             },
             "temperature": 0.6
         }
+        if self.commit_policy == "server_vad":
+            self.session_config["turn_detection"] = {"type": "server_vad"}
 
-    async def connect(self):
-        logger.info(f"Connecting to OpenAI WebSocket: {self.url}")
-        headers = {
-            "api-key": self.api_key,       # f"Bearer {self.api_key}",
-        }
-        
-        self.ws = await websockets.connect(
-            self.url,
-            extra_headers=headers,
-            ssl=self.ssl_context
+    async def accept(self) -> bool:
+        if not await manager.connect(self.websocket, self.client_id):
+            return False
+        self.trace = TurnTracer("openai", self.client_id, self.conversation_id)
+        return True
+
+    async def from_client(self, message: dict) -> bool:
+        frame = message.get("bytes")
+        if frame is not None:
+            if frame and frame[0] == AUDIO_FRAME:
+                await self.process_audio(memoryview(frame)[1:])
+            elif frame and frame[0] == COMMIT_FRAME:
+                await self.commit_audio()
+            return True
+
+        data = json.loads(message["text"])
+        if data["type"] == "audio":
+            await self.process_audio(data["data"])
+        elif data["type"] == "commit":
+            await self.commit_audio()
+        elif data["type"] == "close":
+            return False
+        return True
+
+    async def to_client(self):
+        await self.handle_openai_messages()
+
+    async def close(self):
+        await manager.disconnect(self.client_id, self.websocket)
+        await self.cleanup()
+
+    def pool_key(self) -> tuple:
+        # Whatever the upstream session is configured with; "chunk" and "manual"
+        # differ only in how this relay commits, so they share warmed sessions.
+        return ("openai", self.model, self.url, json.dumps(self.session_config, sort_keys=True))
+
+    @property
+    def endpoint(self) -> str:
+        return urlsplit(self.url).netloc
+
+    def session_factory(self):
+        return functools.partial(
+            open_realtime_session, self.url, self.api_key, self.ssl_context, dict(self.session_config)
+        )
+
+    def warm(self):
+        session_pool.warm(self.pool_key(), self.session_factory(), health=websocket_healthy, alive=websocket_open)
+
+    async def open_upstream(self):
+        # A pre-warmed session (for a configuration warmed at startup) has already
+        # done the handshake and session.update.
+        self.ws, _ = await session_pool.acquire(
+            self.pool_key(), self.session_factory(), health=websocket_healthy, alive=websocket_open
         )
-        logger.info("Connected to OpenAI Realtime API")
 
-        await self.send_event({
-            "type": "session.update",
-            "session": self.session_config
-        })
+    async def connect(self):
+        await self.open_upstream()
         await self.send_event({"type": "response.create"})
 
+    async def reconnect(self):
+        # The new session gets session_config on open; the conversation so far is
+        # restored as items without asking for a response (no second greeting).
+        old, self.ws = self.ws, None
+        if old is not None:
+            with suppress(Exception):
+                await old.close()
+        await self.open_upstream()
+        for role, text in self.turns.items():
+            await self.send_event({
+                "type": "conversation.item.create",
+                "item": {
+                    "type": "message",
+                    "role": role,
+                    "content": [{"type": "input_text" if role == "user" else "text", "text": text}],
+                },
+            })
+        # Audio coalesced before the drop goes ahead of anything the relay held since.
+        await self.flush_audio()
+
+    def _upstream(self):
+        # Mid-reconnect there is no socket; raising lets the relay hold the
+        # message (and flush_audio keep its batch) instead of dropping it.
+        if self.ws is None:
+            raise websockets.ConnectionClosed(None, None)
+        return self.ws
+
     async def send_event(self, event):
-        if self.ws:
-            await self.ws.send(json.dumps(event))
-            logger.debug(f"Event sent - type: {event['type']}")
+        await self._upstream().send(json.dumps(event))
+        event_log.log("Event sent - type: %s", event["type"])
+
+    async def send_raw(self, message: str):
+        await self._upstream().send(message)
 
     async def handle_openai_messages(self):
         try:
             async for message in self.ws:
+                delta = audio_frames.extract_audio_delta(message)
+                self.stats.to_client(len(message), audio=delta is not None)
+                if delta is not None:
+                    await self.send_audio(delta)
+                    continue
                 event = json.loads(message)
                 await self.handle_event(event)
         except websockets.ConnectionClosed as e:
-            logger.error(f"OpenAI WebSocket connection closed: {e}")
+            logger.error("OpenAI WebSocket connection closed: %s", e)
+            if upstream_dropped(e):
+                raise  # the relay reconnects
         except Exception as e:
-            logger.error(f"Error handling OpenAI messages: {e}")
+            logger.error("Error handling OpenAI messages: %s", e)
 
     async def handle_event(self, event):
         event_type = event.get("type")
@@ -121,10 +371,7 @@ class OpenAIRealtimeClient:
             }, self.client_id)
         
         elif event_type == "response.audio.delta":
-            await manager.send_json_response({
-                "type": "audio",
-                "data": event["delta"]
-            }, self.client_id)
+            await self.send_audio(event["delta"])
         
         elif event_type == "response.text.delta":
             await manager.send_json_response({
@@ -132,16 +379,27 @@ class OpenAIRealtimeClient:
                 "data": event["delta"]
             }, self.client_id)
         
+        elif event_type == "conversation.item.input_audio_transcription.completed":
+            self.turns.add("user", event.get("transcript", ""))
+            if self.conversation_id:
+                self.record_input_transcript(event.get("transcript", ""))
+
         elif event_type == "response.done":
             response = event.get("response", {})
             usage = response.get("usage", {})
             output = response.get("output", [])
             
+            input_tokens.inc(usage.get("input_tokens", 0))
+            output_tokens.inc(usage.get("output_tokens", 0))
+            usage_aggregator.record(self.client_id, self.conversation_id, usage)
+            self.trace.response_done(usage)
+
             transcript = ""
             if output and len(output) > 0:
                 content = output[0].get("content", [])
                 if content and len(content) > 0:
                     transcript = content[0].get("transcript", "")
+            self.turns.add("assistant", transcript)
 
             await manager.send_json_response({
                 "type": "completion",
@@ -151,63 +409,163 @@ class OpenAIRealtimeClient:
                 "transcript": transcript
             }, self.client_id)
 
-    async def process_audio(self, base64_audio: str):
+            if self.conversation_id:
+                self.record_turn(transcript, usage)
+
+    async def send_audio(self, delta: str):
+        self.trace.upstream_delta()
+        await manager.send_audio(delta, self.client_id)
+        self.trace.client_send()
+
+    def record_input_transcript(self, transcript: str):
+        if self.pending_turn is not None:
+            self.pending_turn["user_message"] = transcript
+            self.flush_pending_turn()
+        else:
+            self.input_transcript = transcript
+
+    def record_turn(self, transcript: str, usage: dict):
+        # A turn still waiting for its transcription is written as-is once the next one starts.
+        self.flush_pending_turn()
+        turn = {
+            "id_conversation": self.conversation_id,
+            "user_message": self.input_transcript,
+            "agent_message": transcript,
+            "timestamp": datetime.now(),
+            "input_token": usage.get("input_tokens", 0),
+            "output_token": usage.get("output_tokens", 0),
+            "total_token": usage.get("total_tokens", 0),
+            "transcript": transcript
+        }
+        if self.input_transcript is not None:
+            self.input_transcript = None
+            conversation_writer.submit_nowait(turn)
+            return
+
+        # Whisper transcription can land after response.done; give it a moment.
+        self.pending_turn = turn
+        self.pending_turn_task = asyncio.create_task(self._flush_pending_turn_later())
+
+    async def _flush_pending_turn_later(self):
+        await asyncio.sleep(TRANSCRIPTION_GRACE_SECONDS)
+        self.pending_turn_task = None
+        self.flush_pending_turn()
+
+    def flush_pending_turn(self):
+        if self.pending_turn_task is not None:
+            self.pending_turn_task.cancel()
+            self.pending_turn_task = None
+        if self.pending_turn is not None:
+            conversation_writer.submit_nowait(self.pending_turn)
+            self.pending_turn = None
+
+    async def process_audio(self, audio: Union[str, bytes, memoryview]):
+        """Forward one chunk of user audio; `audio` is base64 text or raw PCM16 bytes."""
+        self.trace.client_receive()
         try:
-            await self.send_event({
-                "type": "input_audio_buffer.append",
-                "audio": base64_audio
-            })
-            await self.send_event({"type": "input_audio_buffer.commit"})
-            await self.send_event({"type": "response.create"})
+            if self.commit_policy == "chunk":
+                if isinstance(audio, str):
+                    await self.send_raw(audio_frames.encode_append_base64(audio))
+                else:
+                    await self.send_raw(audio_frames.encode_append(audio))
+                self.trace.upstream_send()
+                await self.send_event({"type": "input_audio_buffer.commit"})
+                await self.send_event({"type": "response.create"})
+                return
+
+            # Coalesce small mic frames into fewer, larger appends.
+            self.audio_buffer += base64.b64decode(audio, validate=True) if isinstance(audio, str) else audio
+            if len(self.audio_buffer) >= AUDIO_COALESCE_BYTES:
+                try:
+                    await self.flush_audio()
+                except websockets.ConnectionClosed:
+                    # The chunk is already in audio_buffer, which reconnect() flushes
+                    # into the new upstream; letting the relay hold it too would send it twice.
+                    pass
+            elif self.audio_flush_task is None:
+                self.audio_flush_task = asyncio.create_task(self._flush_audio_later())
+        except websockets.ConnectionClosed:
+            raise  # chunk mode: the relay holds this chunk and resends it after reconnecting
         except Exception as e:
-            logger.error(f"Error processing audio: {e}")
+            logger.error("Error processing audio: %s", e)
             await manager.send_json_response({
                 "type": "error",
                 "message": f"Error processing audio: {str(e)}"
             }, self.client_id)
 
+    async def _flush_audio_later(self):
+        await asyncio.sleep(AUDIO_COALESCE_MS / 1000)
+        self.audio_flush_task = None
+        try:
+            await self.flush_audio()
+        except websockets.ConnectionClosed:
+            pass  # the batch stays in audio_buffer for the replacement upstream
+        except Exception as e:
+            logger.error("Error flushing audio: %s", e)
+
+    async def flush_audio(self):
+        if self.audio_flush_task is not None:
+            self.audio_flush_task.cancel()
+            self.audio_flush_task = None
+        if not self.audio_buffer:
+            return
+        # Swap before awaiting so frames arriving meanwhile start a new batch.
+        pcm, self.audio_buffer = self.audio_buffer, bytearray()
+        try:
+            await self.send_raw(audio_frames.encode_append(pcm))
+        except websockets.ConnectionClosed:
+            # Put the batch back so it goes to the replacement upstream, bounded
+            # like the relay's own hold buffer (oldest audio dropped first).
+            self.audio_buffer[:0] = pcm
+            del self.audio_buffer[:-RECONNECT_BUFFER_BYTES]
+            raise
+        self.trace.upstream_send()
+
+    async def commit_audio(self):
+        """End of the user's utterance: send buffered audio and ask for a response."""
+        try:
+            await self.flush_audio()
+            if self.commit_policy == "manual":
+                await self.send_event({"type": "input_audio_buffer.commit"})
+                await self.send_event({"type": "response.create"})
+        except websockets.ConnectionClosed:
+            raise
+        except Exception as e:
+            logger.error("Error committing audio: %s", e)
+            await manager.send_json_response({
+                "type": "error",
+                "message": f"Error committing audio: {str(e)}"
+            }, self.client_id)
+
     async def cleanup(self):
+        self.flush_pending_turn()
+        if self.trace is not None:
+            self.trace.close()
+        if self.audio_flush_task is not None:
+            self.audio_flush_task.cancel()
         if self.ws:
             await self.ws.close()
 
 @router.websocket("/ws/{client_id}/{voice}")
-async def websocket_endpoint(websocket: WebSocket, client_id: str, voice: str):
+async def websocket_endpoint(
+    websocket: WebSocket,
+    client_id: str,
+    voice: str,
+    conversation_id: Optional[str] = None,
+    commit_policy: str = AUDIO_COMMIT_POLICY,
+):
     openai_client = OpenAIRealtimeClient(
-        instructions="kamu adalah planner perjalanan yang akan membantu user  , jawab dalam 2 kalimat",
+        instructions=REALTIME_INSTRUCTIONS,
         client_id=client_id,
-        voice=voice
+        voice=voice,
+        conversation_id=conversation_id,
+        commit_policy=commit_policy
     )
-    
-    try:
-        await manager.connect(websocket, client_id)
-        await openai_client.connect()
-        
-        openai_handler = asyncio.create_task(openai_client.handle_openai_messages())
-        
-        while True:
-            data = await websocket.receive_json()
-            
-            if data["type"] == "audio":
-                await openai_client.process_audio(data["data"])
-            elif data["type"] == "close":
-                break
-            
-                
-    
-
-    except WebSocketDisconnect:
-        logger.info(f"Client {client_id} disconnected")
-    except Exception as e:
-        logger.error(f"Error in websocket endpoint: {e}")
-    finally:
-        manager.disconnect(client_id)
-        await openai_client.cleanup()
-        if 'openai_handler' in locals():
-            openai_handler.cancel()
+    await Relay(websocket, openai_client).serve()
 
 @router.post("/conversation")
-def post_feature_request(request: Conversation, db: Session = Depends(get_db)):
-    conversation = models.Conversation(
+async def post_feature_request(request: Conversation, durable: bool = False):
+    conversation = dict(
 
         id_conversation=request.id_conversation,
         user_message=request.user_message,
@@ -218,12 +576,99 @@ def post_feature_request(request: Conversation, db: Session = Depends(get_db)):
         total_token  = request.total_token,
         transcript = request.transcript
     )
-    db.add(conversation)
-    db.commit()
-    db.refresh(conversation)
-    return conversation
+    # Rows are written in batches; only wait for the commit when the caller needs the id.
+    row_id = await conversation_writer.submit(conversation, durable=durable)
+    return {"id": row_id, **conversation}
+
+@router.get("/connection-stats")
+def get_connection_stats():
+    return manager.stats()
+
+@router.get("/usage-stats")
+def get_usage_stats():
+    return usage_aggregator.stats()
 
 @router.post("/create-conversation-id")
 def create_id():
     new_id = uuid.uuid4()
     return {"conversation_id": new_id}
+
+
+def encode_cursor(timestamp: datetime, tiebreak: Union[int, str]) -> str:
+    raw = json.dumps([timestamp.isoformat(), tiebreak]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii")
+
+
+def decode_cursor(cursor: str, tiebreak_type: type = int) -> Tuple[datetime, Union[int, str]]:
+    try:
+        timestamp, tiebreak = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(timestamp), tiebreak_type(tiebreak)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def build_page(rows, limit: int, cursor_of=lambda row: (row.timestamp, row.id)) -> dict:
+    # One extra row is fetched to know whether another page exists.
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(*cursor_of(rows[-1]))
+    return {"items": rows, "next_cursor": next_cursor}
+
+
+@router.get("/conversation/{id_conversation}", response_model=ConversationPage)
+async def get_conversation_turns(
+    id_conversation: str,
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """Turns of one conversation, oldest first, paginated on (timestamp, id)."""
+    key = tuple_(models.Conversation.timestamp, models.Conversation.id)
+    query = select(models.Conversation).where(models.Conversation.id_conversation == id_conversation)
+    if cursor:
+        query = query.where(key > tuple_(*decode_cursor(cursor)))
+    query = query.order_by(models.Conversation.timestamp, models.Conversation.id).limit(limit + 1)
+
+    result = await db.execute(query)
+    return build_page(result.scalars().all(), limit)
+
+
+@router.get("/conversations", response_model=ConversationSummaryPage)
+async def list_recent_conversations(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """One row per conversation with its last activity and turn count, most recently
+    active first, paginated on (last_timestamp, id_conversation)."""
+    # Read from the writer-maintained ConversationActivity rows through their
+    # (last_timestamp, id_conversation) index, so a page costs the same at any table size.
+    activity = models.ConversationActivity
+    query = select(activity)
+    if cursor:
+        key = tuple_(activity.last_timestamp, activity.id_conversation)
+        query = query.where(key < tuple_(*decode_cursor(cursor, str)))
+    query = query.order_by(activity.last_timestamp.desc(), activity.id_conversation.desc()).limit(limit + 1)
+
+    result = await db.execute(query)
+    return build_page(result.scalars().all(), limit, lambda row: (row.last_timestamp, row.id_conversation))
+
+
+@router.get("/usage/{dimension}", response_model=UsageReport)
+async def get_usage(
+    dimension: str,
+    key: str = "",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_db),
+):
+    """Token usage per time bucket and in total for one conversation, client or ("total") everything.
+
+    Served from the UsageRollup table plus this worker's unflushed deltas, never
+    from the Conversation rows; other workers' usage shows up after their next flush.
+    Buckets are in UTC; `start`/`end` without a timezone are taken as UTC.
+    """
+    if dimension not in DIMENSIONS:
+        raise HTTPException(status_code=400, detail=f"dimension must be one of {', '.join(DIMENSIONS)}")
+    return await usage_aggregator.query(db, dimension, key, start, end)
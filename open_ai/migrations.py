@@ -0,0 +1,107 @@
+import logging
+import re
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from open_ai import models  # noqa: F401  (registers the tables on Base.metadata)
+from open_ai.database import Base, get_engine
+
+logger = logging.getLogger(__name__)
+
+# Ordered, idempotent schema changes for databases created before the model
+# declared them. Applied names are recorded in SCHEMA_MIGRATIONS_TABLE and
+# skipped afterwards. Append new entries; never edit or reorder applied ones.
+MIGRATIONS = [
+    (
+        "0001_conversation_keyset_indexes",
+        [
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_conversation_id_conversation_timestamp_id '
+            'ON "Conversation" (id_conversation, timestamp, id)',
+            'CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_conversation_timestamp_id '
+            'ON "Conversation" (timestamp, id)',
+        ],
+    ),
+    (
+        # The table and its index come from create_all. Run before deploying the writer
+        # that maintains it: turns inserted between this backfill and that deploy
+        # are not counted.
+        "0002_conversation_activity",
+        [
+            'INSERT INTO "ConversationActivity" (id_conversation, last_timestamp, turns) '
+            'SELECT id_conversation, max(timestamp), count(*) FROM "Conversation" '
+            'WHERE id_conversation IS NOT NULL AND timestamp IS NOT NULL '
+            'GROUP BY id_conversation ON CONFLICT (id_conversation) DO NOTHING',
+            # Conversations are listed from ConversationActivity now; nothing reads this one.
+            'DROP INDEX CONCURRENTLY IF EXISTS ix_conversation_timestamp_id',
+        ],
+    ),
+]
+
+_CREATE_INDEX_CONCURRENTLY = re.compile(r"CREATE INDEX CONCURRENTLY IF NOT EXISTS (\w+)")
+
+
+SCHEMA_MIGRATIONS_TABLE = "schema_migrations"
+
+
+def index_valid(connection, name: str) -> Optional[bool]:
+    """Whether Postgres index `name` is usable; None when it does not exist."""
+    return connection.execute(
+        text("SELECT i.indisvalid FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"),
+        {"name": name},
+    ).scalar()
+
+
+def execute_statement(connection, statement: str):
+    # A failed CREATE INDEX CONCURRENTLY leaves an INVALID index behind, which
+    # IF NOT EXISTS would then skip; drop it first and check the result after.
+    match = _CREATE_INDEX_CONCURRENTLY.match(statement)
+    if match is None or connection.dialect.name != "postgresql":
+        connection.execute(text(statement))
+        return
+    name = match.group(1)
+    if index_valid(connection, name) is False:
+        logger.warning("Dropping invalid index %s left by an earlier build", name)
+        connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    connection.execute(text(statement))
+    if not index_valid(connection, name):
+        raise RuntimeError(f"Index {name} is not valid after CREATE INDEX CONCURRENTLY")
+
+
+def run_migrations(engine: Engine):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block, and avoids
+    # locking writes on a large table while the index builds. A migration that
+    # fails part-way is not recorded; its statements are idempotent, so the next
+    # run simply repeats it.
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {SCHEMA_MIGRATIONS_TABLE} "
+            "(name VARCHAR PRIMARY KEY, applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+        ))
+        applied = set(connection.execute(text(f"SELECT name FROM {SCHEMA_MIGRATIONS_TABLE}")).scalars())
+        for name, statements in MIGRATIONS:
+            if name in applied:
+                logger.debug("Migration %s already applied", name)
+                continue
+            for statement in statements:
+                execute_statement(connection, statement)
+            connection.execute(
+                text(f"INSERT INTO {SCHEMA_MIGRATIONS_TABLE} (name) VALUES (:name) ON CONFLICT DO NOTHING"),
+                {"name": name},
+            )
+            logger.info("Applied migration %s", name)
+
+
+def migrate(engine: Optional[Engine] = None):
+    """Create missing tables, then apply MIGRATIONS. Run once per deploy, not per worker."""
+    engine = engine or get_engine()
+    Base.metadata.create_all(engine)
+    run_migrations(engine)
+
+
+if __name__ == "__main__":
+    from core.log import setup_logging
+
+    setup_logging()
+    migrate()
@@ -1,5 +1,5 @@
 from open_ai.database import Base
-from sqlalchemy import Column, String, Integer, TIMESTAMP
+from sqlalchemy import Column, String, Integer, BigInteger, TIMESTAMP, Index, UniqueConstraint
 
 class Conversation(Base):
 
@@ -15,5 +15,49 @@ class Conversation(Base):
     total_token = Column(Integer)
     transcript = Column(String)
 
+    # Keyset pagination index; existing databases get it from open_ai/migrations.py.
+    __table_args__ = (
+        Index("ix_conversation_id_conversation_timestamp_id", "id_conversation", "timestamp", "id"),
+    )
 
-    
+
+class ConversationActivity(Base):
+    """Last activity and turn count per conversation, kept up to date by open_ai/writer.py.
+
+    Upserted in the same transaction as each batch of `Conversation` rows, so
+    listing conversations pages through this index instead of grouping turns.
+    """
+
+    __tablename__ = "ConversationActivity"
+
+    id_conversation = Column(String, primary_key=True)
+    last_timestamp = Column(TIMESTAMP, nullable=False)
+    turns = Column(BigInteger, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_conversation_activity_last_timestamp_id", "last_timestamp", "id_conversation"),
+    )
+
+
+class UsageRollup(Base):
+    """Token usage pre-aggregated per (dimension, key, time bucket) by open_ai/usage.py.
+
+    `dimension` is "conversation", "client" or "total" (key ""); counters only
+    ever grow, by upserts that add each flushed delta.
+    """
+
+    __tablename__ = "UsageRollup"
+
+    id = Column(Integer, primary_key=True)
+    dimension = Column(String, nullable=False)
+    key = Column(String, nullable=False)
+    bucket_start = Column(TIMESTAMP, nullable=False)
+    responses = Column(BigInteger, nullable=False, default=0)
+    input_token = Column(BigInteger, nullable=False, default=0)
+    output_token = Column(BigInteger, nullable=False, default=0)
+    total_token = Column(BigInteger, nullable=False, default=0)
+
+    # Upsert target and the index behind every usage query.
+    __table_args__ = (
+        UniqueConstraint("dimension", "key", "bucket_start", name="uq_usage_rollup_dimension_key_bucket"),
+    )
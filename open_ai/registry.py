@@ -0,0 +1,229 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import uuid
+from typing import Awaitable, Callable, Optional, Set
+
+from core import config  # noqa: F401  (loads .env)
+
+logger = logging.getLogger(__name__)
+
+SESSION_REGISTRY_BACKEND = os.getenv("SESSION_REGISTRY_BACKEND", "memory")
+SESSION_REGISTRY_REDIS_URL = os.getenv("SESSION_REGISTRY_REDIS_URL", "redis://localhost:6379/0")
+SESSION_LEASE_TTL = float(os.getenv("SESSION_LEASE_TTL", "30"))
+# "reject": a second connection with a live client_id is refused.
+# "takeover": the new connection wins and the old one is closed wherever it lives.
+SESSION_DUPLICATE_POLICY = os.getenv("SESSION_DUPLICATE_POLICY", "reject")
+
+Deliver = Callable[[str, dict], Awaitable[None]]
+Kick = Callable[[str], Awaitable[None]]
+
+
+def make_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class SessionRegistry:
+    """Tracks which worker owns each realtime `client_id` and routes messages to it.
+
+    `deliver(client_id, message)` is called on the owning worker for messages
+    published from anywhere; `kick(client_id)` is called when the local session
+    lost its ownership (taken over, or lease expired).
+    """
+
+    def __init__(self, duplicate_policy: str = SESSION_DUPLICATE_POLICY):
+        self.duplicate_policy = duplicate_policy
+        self.worker_id = make_worker_id()
+        self.local: Set[str] = set()
+        self.deliver: Optional[Deliver] = None
+        self.kick: Optional[Kick] = None
+
+    def bind(self, deliver: Deliver, kick: Kick):
+        self.deliver = deliver
+        self.kick = kick
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        for client_id in list(self.local):
+            await self.release(client_id)
+
+    async def claim(self, client_id: str) -> bool:
+        raise NotImplementedError
+
+    async def release(self, client_id: str):
+        raise NotImplementedError
+
+    async def owner(self, client_id: str) -> Optional[str]:
+        raise NotImplementedError
+
+    async def publish(self, client_id: str, message: dict) -> bool:
+        raise NotImplementedError
+
+
+class InMemorySessionRegistry(SessionRegistry):
+    """Single-process registry; the default when running one worker."""
+
+    async def claim(self, client_id: str) -> bool:
+        if client_id in self.local:
+            if self.duplicate_policy != "takeover":
+                return False
+            await self.kick(client_id)
+        self.local.add(client_id)
+        return True
+
+    async def release(self, client_id: str):
+        self.local.discard(client_id)
+
+    async def owner(self, client_id: str) -> Optional[str]:
+        return self.worker_id if client_id in self.local else None
+
+    async def publish(self, client_id: str, message: dict) -> bool:
+        if client_id not in self.local:
+            return False
+        await self.deliver(client_id, message)
+        return True
+
+
+_RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class RedisSessionRegistry(SessionRegistry):
+    """Registry shared by every worker and node through Redis.
+
+    Ownership is a `SET NX PX` lease renewed in the background; each worker
+    subscribes to its own channel, and messages for a remote `client_id` are
+    published to the owner's channel. Any client with the `redis.asyncio` API
+    works, so tests can pass a `fakeredis.aioredis.FakeRedis` instance.
+    """
+
+    def __init__(
+        self,
+        redis,
+        lease_ttl: float = SESSION_LEASE_TTL,
+        duplicate_policy: str = SESSION_DUPLICATE_POLICY,
+        prefix: str = "realtime",
+    ):
+        super().__init__(duplicate_policy)
+        self.redis = redis
+        self.lease_ms = int(lease_ttl * 1000)
+        self.prefix = prefix
+        self.pubsub = None
+        self.tasks: list = []
+
+    def _key(self, client_id: str) -> str:
+        return f"{self.prefix}:session:{client_id}"
+
+    def _channel(self, worker_id: str) -> str:
+        return f"{self.prefix}:worker:{worker_id}"
+
+    async def start(self):
+        self.pubsub = self.redis.pubsub()
+        await self.pubsub.subscribe(self._channel(self.worker_id))
+        self.tasks = [
+            asyncio.create_task(self._listen()),
+            asyncio.create_task(self._renew_leases()),
+        ]
+
+    async def stop(self):
+        for task in self.tasks:
+            task.cancel()
+        self.tasks = []
+        await super().stop()
+        if self.pubsub is not None:
+            await self.pubsub.unsubscribe()
+            await self.pubsub.aclose()
+            self.pubsub = None
+
+    async def claim(self, client_id: str) -> bool:
+        key = self._key(client_id)
+        if await self.redis.set(key, self.worker_id, nx=True, px=self.lease_ms):
+            self.local.add(client_id)
+            return True
+        if self.duplicate_policy != "takeover":
+            return False
+
+        previous = await self.redis.getset(key, self.worker_id)
+        await self.redis.pexpire(key, self.lease_ms)
+        if previous is not None:
+            previous = previous.decode() if isinstance(previous, bytes) else previous
+            if previous == self.worker_id:
+                await self.kick(client_id)
+            else:
+                await self.redis.publish(self._channel(previous), json.dumps({"client_id": client_id, "kick": True}))
+        self.local.add(client_id)
+        return True
+
+    async def release(self, client_id: str):
+        self.local.discard(client_id)
+        await self.redis.eval(_RELEASE_SCRIPT, 1, self._key(client_id), self.worker_id)
+
+    async def owner(self, client_id: str) -> Optional[str]:
+        owner = await self.redis.get(self._key(client_id))
+        return owner.decode() if isinstance(owner, bytes) else owner
+
+    async def publish(self, client_id: str, message: dict) -> bool:
+        if client_id in self.local:
+            await self.deliver(client_id, message)
+            return True
+        owner = await self.owner(client_id)
+        if owner is None:
+            return False
+        await self.redis.publish(self._channel(owner), json.dumps({"client_id": client_id, "message": message}))
+        return True
+
+    async def _listen(self):
+        async for item in self.pubsub.listen():
+            if item.get("type") != "message":
+                continue
+            try:
+                envelope = json.loads(item["data"])
+                client_id = envelope["client_id"]
+                if envelope.get("kick"):
+                    if client_id in self.local:
+                        self.local.discard(client_id)
+                        await self.kick(client_id)
+                elif client_id in self.local:
+                    await self.deliver(client_id, envelope["message"])
+            except Exception as e:
+                logger.error("Error handling registry message: %s", e)
+
+    async def _renew_leases(self):
+        while True:
+            await asyncio.sleep(self.lease_ms / 3000)
+            for client_id in list(self.local):
+                try:
+                    renewed = await self.redis.eval(
+                        _RENEW_SCRIPT, 1, self._key(client_id), self.worker_id, self.lease_ms
+                    )
+                except Exception as e:
+                    logger.error("Error renewing session lease: %s", e)
+                    continue
+                if not renewed and client_id in self.local:
+                    logger.info("Lost ownership of session %s", client_id)
+                    self.local.discard(client_id)
+                    await self.kick(client_id)
+
+
+def build_registry() -> SessionRegistry:
+    if SESSION_REGISTRY_BACKEND == "redis":
+        # Only needed for multi-worker deployments.
+        import redis.asyncio
+
+        return RedisSessionRegistry(redis.asyncio.from_url(SESSION_REGISTRY_REDIS_URL))
+    return InMemorySessionRegistry()
@@ -1,4 +1,6 @@
 from pydantic import BaseModel
+from datetime import datetime
+from typing import List, Optional
 
 
 
@@ -15,3 +17,62 @@ class Conversation(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+class ConversationRow(BaseModel):
+
+    id : int
+    id_conversation : str
+    user_message: Optional[str] = None
+    agent_message : Optional[str] = None
+    timestamp : datetime
+    input_token : Optional[int] = None
+    output_token : Optional[int] = None
+    total_token : Optional[int] = None
+    transcript : Optional[str] = None
+
+    class Config:
+        orm_mode = True
+
+
+class ConversationPage(BaseModel):
+
+    items : List[ConversationRow]
+    next_cursor : Optional[str] = None
+
+
+class ConversationSummary(BaseModel):
+
+    id_conversation : str
+    last_timestamp : datetime
+    turns : int
+
+    class Config:
+        orm_mode = True
+
+
+class ConversationSummaryPage(BaseModel):
+
+    items : List[ConversationSummary]
+    next_cursor : Optional[str] = None
+
+
+class UsageBucket(BaseModel):
+
+    bucket_start : datetime
+    responses : int
+    input_token : int
+    output_token : int
+    total_token : int
+
+
+class UsageReport(BaseModel):
+
+    dimension : str
+    key : str
+    bucket_seconds : int
+    responses : int
+    input_token : int
+    output_token : int
+    total_token : int
+    buckets : List[UsageBucket]
@@ -0,0 +1,158 @@
+import asyncio
+import base64
+import logging
+import os
+from collections import deque
+from typing import Deque, List
+
+from fastapi import WebSocket
+
+from core import config  # noqa: F401  (loads .env)
+from core.audio_frames import AUDIO_FRAME
+from open_ai import audio_frames
+
+logger = logging.getLogger(__name__)
+
+SEND_QUEUE_MAX_FRAMES = int(os.getenv("SEND_QUEUE_MAX_FRAMES", "256"))
+# Once this many frames are waiting, consecutive audio deltas are merged into one frame.
+SEND_QUEUE_MERGE_DEPTH = int(os.getenv("SEND_QUEUE_MERGE_DEPTH", "32"))
+SEND_QUEUE_MAX_MERGE_BYTES = int(os.getenv("SEND_QUEUE_MAX_MERGE_BYTES", "262144"))
+# Extra slots above SEND_QUEUE_MAX_FRAMES that only control (JSON) messages may use.
+SEND_QUEUE_CONTROL_HEADROOM = int(os.getenv("SEND_QUEUE_CONTROL_HEADROOM", "64"))
+
+AUDIO = "audio"
+JSON = "json"
+
+
+class ClientSendQueue:
+    """Bounded outbound queue drained by a dedicated writer task for one websocket.
+
+    Producers never await the socket. When the client falls behind, queued audio
+    deltas are merged into larger frames, and audio that no longer fits is dropped.
+    Control messages (text, completion, errors) evict the oldest queued audio when
+    the queue is full, and may otherwise overflow `max_frames` by `control_headroom`
+    frames; only a client that stalls past that loses control messages, counted
+    in `dropped_control_frames` rather than `dropped_frames`.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        binary: bool = False,
+        max_frames: int = SEND_QUEUE_MAX_FRAMES,
+        merge_depth: int = SEND_QUEUE_MERGE_DEPTH,
+        max_merge_bytes: int = SEND_QUEUE_MAX_MERGE_BYTES,
+        control_headroom: int = SEND_QUEUE_CONTROL_HEADROOM,
+    ):
+        self.websocket = websocket
+        self.binary = binary
+        self.max_frames = max_frames
+        self.merge_depth = merge_depth
+        self.max_merge_bytes = max_merge_bytes
+        self.control_headroom = control_headroom
+        # Items are [kind, payload, size]; audio payloads are lists of base64 deltas.
+        self.frames: Deque[list] = deque()
+        self.ready = asyncio.Event()
+        self.closed = False
+        self.sent_frames = 0
+        self.dropped_frames = 0
+        self.dropped_control_frames = 0
+        self.merged_frames = 0
+        self.max_depth_seen = 0
+        self.writer = asyncio.create_task(self._run())
+
+    def put_json(self, data: dict):
+        if self.closed:
+            return
+        if (
+            len(self.frames) >= self.max_frames
+            and not self._evict_audio()
+            and len(self.frames) >= self.max_frames + self.control_headroom
+        ):
+            self.dropped_control_frames += 1
+            return
+        self.frames.append([JSON, data, 0])
+        self._wake()
+
+    def put_audio(self, delta: str):
+        if self.closed:
+            return
+        last = self.frames[-1] if self.frames else None
+        if (
+            last is not None
+            and last[0] == AUDIO
+            and len(self.frames) >= self.merge_depth
+            and last[2] + len(delta) <= self.max_merge_bytes
+        ):
+            last[1].append(delta)
+            last[2] += len(delta)
+            self.merged_frames += 1
+            return
+        if len(self.frames) >= self.max_frames:
+            self.dropped_frames += 1
+            return
+        self.frames.append([AUDIO, [delta], len(delta)])
+        self._wake()
+
+    def _evict_audio(self) -> bool:
+        for index, frame in enumerate(self.frames):
+            if frame[0] == AUDIO:
+                del self.frames[index]
+                self.dropped_frames += len(frame[1])
+                return True
+        return False
+
+    def _wake(self):
+        depth = len(self.frames)
+        if depth > self.max_depth_seen:
+            self.max_depth_seen = depth
+        self.ready.set()
+
+    async def _run(self):
+        try:
+            while True:
+                if not self.frames:
+                    self.ready.clear()
+                    await self.ready.wait()
+                    continue
+                kind, payload, _ = self.frames.popleft()
+                if kind == JSON:
+                    await self.websocket.send_json(payload)
+                elif self.binary:
+                    await self.websocket.send_bytes(self._audio_bytes(payload))
+                elif len(payload) == 1:
+                    await self.websocket.send_text(audio_frames.audio_json(payload[0]))
+                else:
+                    merged = base64.b64encode(self._pcm(payload)).decode("ascii")
+                    await self.websocket.send_text(audio_frames.audio_json(merged))
+                self.sent_frames += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.info("Send queue writer stopped: %s", e)
+        finally:
+            self.closed = True
+            self.frames.clear()
+
+    @staticmethod
+    def _pcm(deltas: List[str]) -> bytes:
+        return b"".join(base64.b64decode(delta) for delta in deltas)
+
+    def _audio_bytes(self, deltas: List[str]) -> bytes:
+        if len(deltas) == 1:
+            return audio_frames.audio_frame(deltas[0])
+        return bytes((AUDIO_FRAME,)) + self._pcm(deltas)
+
+    def close(self):
+        self.closed = True
+        self.writer.cancel()
+
+    def stats(self) -> dict:
+        return {
+            "depth": len(self.frames),
+            "max_depth_seen": self.max_depth_seen,
+            "sent_frames": self.sent_frames,
+            "dropped_frames": self.dropped_frames,
+            "dropped_control_frames": self.dropped_control_frames,
+            "merged_frames": self.merged_frames,
+        }
@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+
+from core import config  # noqa: F401  (loads .env)
+from open_ai import models
+from open_ai.database import AsyncSensionalocal
+from core.metrics import DB_INSERT_ROWS, DB_INSERT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+USAGE_BUCKET_SECONDS = int(os.getenv("USAGE_BUCKET_SECONDS", "3600"))
+USAGE_FLUSH_INTERVAL = float(os.getenv("USAGE_FLUSH_INTERVAL", "10"))
+# Rows per upsert statement; keeps bind parameters well under Postgres' 32767 limit.
+UPSERT_CHUNK_ROWS = 1000
+
+DIMENSIONS = ("conversation", "client", "total")
+COUNTERS = ("responses", "input_token", "output_token", "total_token")
+
+# (dimension, key, bucket_start)
+RollupKey = Tuple[str, str, datetime]
+
+upsert_seconds = DB_INSERT_SECONDS.labels(models.UsageRollup.__tablename__)
+upserted_rows = DB_INSERT_ROWS.labels(models.UsageRollup.__tablename__)
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def as_utc(at: datetime) -> datetime:
+    """Rollup times are naive UTC (the column is TIMESTAMP); naive inputs are taken as UTC."""
+    if at.tzinfo is not None:
+        return at.astimezone(timezone.utc).replace(tzinfo=None)
+    return at
+
+
+def bucket_start(at: datetime, bucket_seconds: int = USAGE_BUCKET_SECONDS) -> datetime:
+    seconds = int((as_utc(at) - _EPOCH).total_seconds())
+    return _EPOCH + timedelta(seconds=seconds - seconds % bucket_seconds)
+
+
+class UsageAggregator:
+    """Incrementally maintained token usage rollups, flushed as upserts to `UsageRollup`.
+
+    `record` only adds to in-memory counters, so it is safe on the websocket
+    hot path. Every `flush_interval` seconds the accumulated deltas are added to
+    their rows in one transaction; a failed flush keeps the deltas for the next one.
+    Queries combine the flushed rows with this worker's unflushed deltas.
+    """
+
+    def __init__(
+        self,
+        session_factory=AsyncSensionalocal,
+        bucket_seconds: int = USAGE_BUCKET_SECONDS,
+        flush_interval: float = USAGE_FLUSH_INTERVAL,
+    ):
+        self.session_factory = session_factory
+        self.bucket_seconds = bucket_seconds
+        self.flush_interval = flush_interval
+        self.pending: Dict[RollupKey, List[int]] = {}
+        self.task: Optional[asyncio.Task] = None
+        self.stopping = asyncio.Event()
+        self.recorded_responses = 0
+        self.flushed_rows = 0
+        self.failed_flushes = 0
+
+    async def start(self):
+        if self.task is None:
+            self.stopping.clear()
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush outstanding deltas, then stop the background task."""
+        if self.task is None:
+            return
+        self.stopping.set()
+        await self.task
+        self.task = None
+
+    def record(self, client_id: str, conversation_id: Optional[str], usage: dict, at: Optional[datetime] = None):
+        """Add one `response.done` usage block to every rollup it belongs to."""
+        delta = (
+            1,
+            usage.get("input_tokens", 0) or 0,
+            usage.get("output_tokens", 0) or 0,
+            usage.get("total_tokens", 0) or 0,
+        )
+        bucket = bucket_start(at or datetime.now(timezone.utc), self.bucket_seconds)
+        self._add(("total", "", bucket), delta)
+        self._add(("client", client_id, bucket), delta)
+        if conversation_id:
+            self._add(("conversation", conversation_id, bucket), delta)
+        self.recorded_responses += 1
+
+    def _add(self, key: RollupKey, delta):
+        counters = self.pending.get(key)
+        if counters is None:
+            self.pending[key] = list(delta)
+            return
+        for index, value in enumerate(delta):
+            counters[index] += value
+
+    async def _run(self):
+        # Not cancelled on stop: a flush interrupted mid-upsert would lose its deltas.
+        while not self.stopping.is_set():
+            try:
+                await asyncio.wait_for(self.stopping.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+    async def flush(self):
+        if not self.pending:
+            return
+        # Swap first: deltas recorded while the upsert runs go to the next flush.
+        pending, self.pending = self.pending, {}
+        try:
+            await self._upsert(pending)
+        except Exception as e:
+            self.failed_flushes += 1
+            logger.error("Failed to flush %d usage rollups: %s", len(pending), e)
+            for key, counters in pending.items():
+                self._add(key, counters)
+            return
+        self.flushed_rows += len(pending)
+
+    async def _upsert(self, pending: Dict[RollupKey, List[int]]):
+        table = models.UsageRollup.__table__
+        rows = [
+            {"dimension": dimension, "key": key, "bucket_start": bucket, **dict(zip(COUNTERS, counters))}
+            for (dimension, key, bucket), counters in pending.items()
+        ]
+        with upsert_seconds.time():
+            # One transaction, so a failed flush can be retried without double counting.
+            async with self.session_factory() as db:
+                for start in range(0, len(rows), UPSERT_CHUNK_ROWS):
+                    statement = insert(table).values(rows[start:start + UPSERT_CHUNK_ROWS])
+                    statement = statement.on_conflict_do_update(
+                        constraint="uq_usage_rollup_dimension_key_bucket",
+                        set_={name: table.c[name] + statement.excluded[name] for name in COUNTERS},
+                    )
+                    await db.execute(statement)
+                await db.commit()
+        upserted_rows.inc(len(rows))
+
+    async def query(
+        self,
+        db,
+        dimension: str,
+        key: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> dict:
+        """Totals and per-bucket usage for one rollup key over [start, end)."""
+        if start is not None:
+            start = bucket_start(start, self.bucket_seconds)
+        if end is not None:
+            end = as_utc(end)
+        rollup = models.UsageRollup
+        query = select(
+            rollup.bucket_start, *(getattr(rollup, name) for name in COUNTERS)
+        ).where(rollup.dimension == dimension, rollup.key == key)
+        if start is not None:
+            query = query.where(rollup.bucket_start >= start)
+        if end is not None:
+            query = query.where(rollup.bucket_start < end)
+        result = await db.execute(query.order_by(rollup.bucket_start))
+
+        buckets: Dict[datetime, List[int]] = {row[0]: list(row[1:]) for row in result.all()}
+        for (pending_dimension, pending_key, bucket), counters in self.pending.items():
+            if pending_dimension != dimension or pending_key != key:
+                continue
+            if (start is not None and bucket < start) or (end is not None and bucket >= end):
+                continue
+            totals = buckets.setdefault(bucket, [0] * len(COUNTERS))
+            for index, value in enumerate(counters):
+                totals[index] += value
+
+        ordered = sorted(buckets.items())
+        return {
+            "dimension": dimension,
+            "key": key,
+            "bucket_seconds": self.bucket_seconds,
+            **{name: sum(counters[index] for _, counters in ordered) for index, name in enumerate(COUNTERS)},
+            "buckets": [
+                {"bucket_start": bucket, **dict(zip(COUNTERS, counters))}
+                for bucket, counters in ordered
+            ],
+        }
+
+    def stats(self) -> dict:
+        return {
+            "pending_rollups": len(self.pending),
+            "recorded_responses": self.recorded_responses,
+            "flushed_rows": self.flushed_rows,
+            "failed_flushes": self.failed_flushes,
+        }
+
+
+usage_aggregator = UsageAggregator()
@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import os
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func, insert
+from sqlalchemy.dialects.postgresql import insert as upsert
+
+from core import config  # noqa: F401  (loads .env)
+from open_ai import models
+from open_ai.database import AsyncSensionalocal
+from core.metrics import DB_INSERT_ROWS, DB_INSERT_SECONDS
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH = int(os.getenv("CONVERSATION_WRITER_MAX_BATCH", "500"))
+FLUSH_INTERVAL = float(os.getenv("CONVERSATION_WRITER_FLUSH_INTERVAL", "0.5"))
+MAX_PENDING = int(os.getenv("CONVERSATION_WRITER_MAX_PENDING", "10000"))
+
+Pending = Tuple[dict, Optional[asyncio.Future]]
+
+insert_seconds = DB_INSERT_SECONDS.labels(models.Conversation.__tablename__)
+inserted_rows = DB_INSERT_ROWS.labels(models.Conversation.__tablename__)
+
+
+def conversation_activity(rows: List[dict]) -> List[dict]:
+    """Per-conversation (last_timestamp, turns) deltas of one batch, sorted by id.
+
+    Sorted so that concurrent writers lock the activity rows in the same order.
+    """
+    activity = {}
+    for row in rows:
+        id_conversation, timestamp = row.get("id_conversation"), row.get("timestamp")
+        if id_conversation is None or timestamp is None:
+            continue
+        entry = activity.get(id_conversation)
+        if entry is None:
+            activity[id_conversation] = {"id_conversation": id_conversation, "last_timestamp": timestamp, "turns": 1}
+        else:
+            entry["last_timestamp"] = max(entry["last_timestamp"], timestamp)
+            entry["turns"] += 1
+    return [activity[key] for key in sorted(activity)]
+
+
+def activity_upsert(activity: List[dict]):
+    table = models.ConversationActivity.__table__
+    statement = upsert(table).values(activity)
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.id_conversation],
+        set_={
+            "last_timestamp": func.greatest(table.c.last_timestamp, statement.excluded.last_timestamp),
+            "turns": table.c.turns + statement.excluded.turns,
+        },
+    )
+
+
+class ConversationWriter:
+    """Write-behind buffer that turns many `Conversation` rows into few bulk INSERTs.
+
+    Rows are flushed when `max_batch` is reached or `flush_interval` seconds after
+    the first buffered row. `submit` blocks once `max_pending` rows are queued,
+    which pushes back on producers instead of growing memory without bound.
+    """
+
+    def __init__(
+        self,
+        session_factory=AsyncSensionalocal,
+        max_batch: int = MAX_BATCH,
+        flush_interval: float = FLUSH_INTERVAL,
+        max_pending: int = MAX_PENDING,
+    ):
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.queue: Optional[asyncio.Queue] = None
+        self.task: Optional[asyncio.Task] = None
+        self.flushed_rows = 0
+        self.flushed_batches = 0
+        self.failed_rows = 0
+        self.dropped_rows = 0
+
+    async def start(self):
+        self._ensure_started()
+
+    def _ensure_started(self):
+        if self.task is None:
+            self.queue = asyncio.Queue(maxsize=self.max_pending)
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Flush everything still buffered, then stop the background task."""
+        if self.task is None:
+            return
+        await self.queue.put(None)
+        await self.task
+        self.task = None
+
+    async def submit(self, row: dict, durable: bool = False) -> Optional[int]:
+        """Queue a row; with `durable=True` wait for its commit and return the new `id`."""
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future() if durable else None
+        await self.queue.put((row, future))
+        if future is not None:
+            return await future
+        return None
+
+    def submit_nowait(self, row: dict) -> bool:
+        """Queue a row without waiting; drops it and returns False when the buffer is full.
+
+        For callers on a hot path (e.g. a websocket reader loop) that must never block.
+        """
+        self._ensure_started()
+        try:
+            self.queue.put_nowait((row, None))
+        except asyncio.QueueFull:
+            self.dropped_rows += 1
+            logger.warning("Conversation writer buffer full, dropping row")
+            return False
+        return True
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            item = await self.queue.get()
+            if item is None:
+                break
+            batch: List[Pending] = [item]
+            deadline = asyncio.get_running_loop().time() + self.flush_interval
+            while len(batch) < self.max_batch:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            await self._flush(batch)
+
+        # Drain whatever was queued behind the stop sentinel.
+        batch = []
+        while not self.queue.empty():
+            item = self.queue.get_nowait()
+            if item is not None:
+                batch.append(item)
+        for start in range(0, len(batch), self.max_batch):
+            await self._flush(batch[start:start + self.max_batch])
+
+    async def _flush(self, batch: List[Pending]):
+        rows = [row for row, _ in batch]
+        try:
+            ids = await self._insert(rows)
+        except Exception as e:
+            self.failed_rows += len(rows)
+            logger.error("Failed to flush %d conversation rows: %s", len(rows), e)
+            for _, future in batch:
+                if future is not None and not future.done():
+                    future.set_exception(e)
+            return
+
+        self.flushed_rows += len(rows)
+        self.flushed_batches += 1
+        for (_, future), row_id in zip(batch, ids):
+            if future is not None and not future.done():
+                future.set_result(row_id)
+
+    async def _insert(self, rows: List[dict]) -> List[int]:
+        statement = insert(models.Conversation).returning(
+            models.Conversation.id, sort_by_parameter_order=True
+        )
+        activity = conversation_activity(rows)
+        with insert_seconds.time():
+            async with self.session_factory() as db:
+                result = await db.execute(statement, rows)
+                ids = result.scalars().all()
+                if activity:
+                    await db.execute(activity_upsert(activity))
+                await db.commit()
+        inserted_rows.inc(len(ids))
+        return ids
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.queue.qsize() if self.queue else 0,
+            "max_pending": self.max_pending,
+            "flushed_rows": self.flushed_rows,
+            "flushed_batches": self.flushed_batches,
+            "failed_rows": self.failed_rows,
+            "dropped_rows": self.dropped_rows,
+        }
+
+
+conversation_writer = ConversationWriter()
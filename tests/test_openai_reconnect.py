@@ -0,0 +1,109 @@
+"""Drop-then-replay of client audio across an OpenAI upstream reconnect.
+
+Runs a real `Relay` around `OpenAIRealtimeClient` with in-memory browser and
+upstream sockets, so no network or API key is needed:
+
+    python -m pytest tests
+"""
+import asyncio
+import base64
+import json
+
+import websockets
+
+import core.relay
+import open_ai.endpoints as endpoints
+from core.relay import Relay
+
+
+class FakeBrowser:
+    """ASGI-style browser socket fed from a queue."""
+
+    def __init__(self):
+        self.scope = {"subprotocols": []}
+        self.incoming: asyncio.Queue = asyncio.Queue()
+        self.closed = asyncio.Event()
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def receive(self):
+        return await self.incoming.get()
+
+    async def send_text(self, text):
+        pass
+
+    async def send_bytes(self, data):
+        pass
+
+    async def close(self, code=1000, reason=None):
+        self.closed.set()
+
+    def send(self, data: dict):
+        self.incoming.put_nowait({"type": "websocket.receive", "text": json.dumps(data)})
+
+
+class FakeUpstream:
+    """Records appended audio; `drop_on_append` makes the first append fail like a dropped socket."""
+
+    def __init__(self, drop_on_append: bool = False):
+        self.drop_on_append = drop_on_append
+        self.dropped = asyncio.Event()
+        self.sent = []
+        self.appended = bytearray()
+
+    async def send(self, message: str):
+        event = json.loads(message)
+        if event["type"] == "input_audio_buffer.append":
+            if self.drop_on_append:
+                self.dropped.set()
+                raise websockets.ConnectionClosed(None, None)
+            self.appended += base64.b64decode(event["audio"])
+        self.sent.append(event["type"])
+
+    async def close(self):
+        self.dropped.set()
+
+    def __aiter__(self):
+        return self._messages()
+
+    async def _messages(self):
+        await self.dropped.wait()
+        raise websockets.ConnectionClosed(None, None)  # abnormal closure (1006)
+        yield
+
+
+def test_audio_is_sent_once_after_reconnect(monkeypatch):
+    upstreams = [FakeUpstream(drop_on_append=True), FakeUpstream()]
+    monkeypatch.setattr(core.relay, "backoff_delays", lambda: iter([0] * 3))
+
+    async def run():
+        client = endpoints.OpenAIRealtimeClient("test", "reconnect-client", commit_policy="manual")
+        opened = iter(upstreams)
+
+        async def open_upstream():
+            client.ws = next(opened)
+
+        client.open_upstream = open_upstream
+        browser = FakeBrowser()
+        relay = Relay(browser, client)
+        serving = asyncio.create_task(relay.serve())
+
+        # One chunk above the coalescing threshold, so it is flushed straight away and hits the drop.
+        chunk = bytes(range(256)) * 40
+        browser.send({"type": "audio", "data": base64.b64encode(chunk).decode("ascii")})
+        for _ in range(200):
+            if relay.reconnects and relay.upstream_ready.is_set():
+                break
+            await asyncio.sleep(0.01)
+        browser.send({"type": "commit"})
+        browser.send({"type": "close"})
+        await asyncio.wait_for(serving, 5)
+        return relay, chunk
+
+    relay, chunk = asyncio.run(run())
+
+    assert relay.reconnects == 1
+    assert upstreams[0].appended == b""
+    assert bytes(upstreams[1].appended) == chunk
+    assert upstreams[1].sent.count("input_audio_buffer.commit") == 1